@@ -0,0 +1,374 @@
+import argparse
+import json
+import math
+import os
+import platform
+import threading
+import time
+from datetime import datetime
+
+from device_commands import READ_COMMANDS
+from serial_communication import SerialHandler
+from device_manager import DeviceManager
+from line_protocol import parse_reply
+from tension_controller import PIDController, TensionControlLoop
+
+
+def percentile(sorted_values, fraction):
+    """Percentyl metodą najbliższej rangi z posortowanej listy."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class ScenarioResult:
+    """Wyniki jednego scenariusza: czasy [s], liczba komend, przekroczenia czasu, powtórzenia i błędne odpowiedzi.
+
+    timeouts - komendy bez odpowiedzi mimo powtórzeń, retries / attempt_timeouts - powtórzenia i przekroczenia
+    czasu pojedynczych prób (z liczników SerialHandler.diagnostics w trakcie scenariusza).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.commands = 0
+        self.timeouts = 0
+        self.invalid = 0
+        self.errors = 0
+        self.retries = 0
+        self.attempt_timeouts = 0
+        self.elapsed = 0.0
+        self.extra = {}
+
+    def record(self, command, response, latency, expected=None):
+        self.commands += 1
+        if response is None:
+            self.timeouts += 1
+            return
+        self.latencies.append(latency)
+        # Ta sama weryfikacja co w send_command / send_write_command aplikacji
+        if expected is not None:
+            if not (command in response and f"{expected}" in response):
+                self.invalid += 1
+        elif not (command.split('_')[0] in response and command in response):
+            self.invalid += 1
+
+    def to_dict(self):
+        latencies = sorted(self.latencies)
+        to_ms = lambda value: round(value * 1000, 3) if value is not None else None
+        return {
+            "commands": self.commands,
+            "elapsed_s": round(self.elapsed, 4),
+            "commands_per_s": round(self.commands / self.elapsed, 1) if self.elapsed else None,
+            "latency_ms": {
+                "p50": to_ms(percentile(latencies, 0.50)),
+                "p95": to_ms(percentile(latencies, 0.95)),
+                "p99": to_ms(percentile(latencies, 0.99)),
+                "mean": to_ms(sum(latencies) / len(latencies)) if latencies else None,
+                "max": to_ms(latencies[-1]) if latencies else None,
+            },
+            "timeouts": self.timeouts,
+            "timeout_rate": round(self.timeouts / self.commands, 4) if self.commands else 0,
+            "retries": self.retries,
+            "retry_rate": round(self.retries / self.commands, 4) if self.commands else 0,
+            "attempt_timeouts": self.attempt_timeouts,
+            "invalid": self.invalid,
+            "invalid_rate": round(self.invalid / self.commands, 4) if self.commands else 0,
+            "errors": self.errors,
+            **self.extra,
+        }
+
+
+class ProtocolBenchmark:
+    """Pomiar opóźnień i przepustowości SerialHandler na podanym porcie (urządzenie lub symulator)."""
+
+    def __init__(self, handler, iterations=200):
+        self.handler = handler
+        self.iterations = iterations
+
+    def run_all(self):
+        scenarios = [
+            (self.single_reads, "hx_read"),
+            (self.single_writes, "pot_3"),
+            (self.sweep_sequential,),
+            (self.sweep_pipelined,),
+            (self.autoupdate_polling,),
+            (self.autoupdate_stream,),
+            (self.control_loop,),
+        ]
+        results = [self.run_scenario(scenario, *args) for scenario, *args in scenarios]
+        return {result.name: result.to_dict() for result in results}
+
+    def run_scenario(self, scenario, *args):
+        """Uruchamia scenariusz i przypisuje mu powtórzenia i przekroczenia czasu zliczone w jego trakcie."""
+        retries, timeouts = self._diagnostic_counters()
+        result = scenario(*args)
+        retries_after, timeouts_after = self._diagnostic_counters()
+        result.retries = retries_after - retries
+        result.attempt_timeouts = timeouts_after - timeouts
+        return result
+
+    def _diagnostic_counters(self):
+        commands = self.handler.diagnostics.snapshot()["commands"].values()
+        return sum(stats["retries"] for stats in commands), sum(stats["timeouts"] for stats in commands)
+
+    def _timed_transact(self, result, command, expected=None):
+        start = time.perf_counter()
+        try:
+            response = self.handler.transact(command)
+        except Exception:
+            result.errors += 1
+            return None
+        result.record(command, response, time.perf_counter() - start, expected)
+        return response
+
+    def single_reads(self, command):
+        result = ScenarioResult(f"single_read_{command}")
+        start = time.perf_counter()
+        for _ in range(self.iterations):
+            self._timed_transact(result, command)
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def single_writes(self, command):
+        result = ScenarioResult(f"single_write_{command}")
+        start = time.perf_counter()
+        for i in range(self.iterations):
+            value = i % 256
+            self._timed_transact(result, f"{command}_{value}", expected=value)
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def sweep_sequential(self):
+        """Odpowiednik dawnego "Wyślij wszystkie": każda komenda czeka na swoją odpowiedź."""
+        result = ScenarioResult("sweep_sequential")
+        sweeps = max(1, self.iterations // len(READ_COMMANDS))
+        sweep_times = []
+        start = time.perf_counter()
+        for _ in range(sweeps):
+            sweep_start = time.perf_counter()
+            for command in READ_COMMANDS:
+                self._timed_transact(result, command)
+            sweep_times.append(time.perf_counter() - sweep_start)
+        result.elapsed = time.perf_counter() - start
+        result.extra["sweep_ms_p50"] = round(percentile(sorted(sweep_times), 0.5) * 1000, 3)
+        return result
+
+    def sweep_pipelined(self, max_in_flight=8):
+        """Odczyt całej tabeli przez send_batch (Interface.send_all_commands)."""
+        result = ScenarioResult(f"sweep_pipelined_{max_in_flight}")
+        sweeps = max(1, self.iterations // len(READ_COMMANDS))
+        sweep_times = []
+        start = time.perf_counter()
+        for _ in range(sweeps):
+            sweep_start = time.perf_counter()
+            try:
+                responses = self.handler.send_batch(READ_COMMANDS, max_in_flight=max_in_flight)
+            except Exception:
+                result.errors += 1
+                continue
+            sweep_time = time.perf_counter() - sweep_start
+            sweep_times.append(sweep_time)
+            for command in READ_COMMANDS:
+                # Opóźnienie pojedynczej komendy nie jest mierzalne w potoku - liczymy średnie na komendę
+                result.record(command, responses.get(command), sweep_time / len(READ_COMMANDS))
+        result.elapsed = time.perf_counter() - start
+        if sweep_times:
+            result.extra["sweep_ms_p50"] = round(percentile(sorted(sweep_times), 0.5) * 1000, 3)
+        return result
+
+    def autoupdate_polling(self):
+        """Pętla hx_read + encoder_1 jak w MainApp.start_queue_automatic_update (bez opóźnień)."""
+        result = ScenarioResult("autoupdate_polling")
+        pairs = max(1, self.iterations // 2)
+        start = time.perf_counter()
+        for _ in range(pairs):
+            self._timed_transact(result, "hx_read")
+            self._timed_transact(result, "encoder_1")
+        result.elapsed = time.perf_counter() - start
+        result.extra["samples_per_s"] = round(pairs / result.elapsed, 1) if result.elapsed else None
+        return result
+
+    def autoupdate_stream(self, rate=200, duration=1.0):
+        """Strumień hx_read/encoder_1 wysyłany przez urządzenie (stream_<Hz>)."""
+        result = ScenarioResult("autoupdate_stream")
+        samples = {"hx_read": 0, "encoder_1": 0}
+        lock = threading.Lock()
+
+        def on_line(command):
+            def callback(line):
+                with lock:
+                    samples[command] += 1
+            return callback
+
+        for command in samples:
+            self.handler.add_listener(command, on_line(command))
+        try:
+            response = self._timed_transact(result, f"stream_{rate}", expected=rate)
+            if response and "done ok" in response:
+                start = time.perf_counter()
+                time.sleep(duration)
+                result.elapsed = time.perf_counter() - start
+                self._timed_transact(result, "stream_0", expected=0)
+            else:
+                result.extra["supported"] = False
+        finally:
+            for command in samples:
+                self.handler.remove_listener(command)
+        if result.elapsed:
+            result.extra["requested_rate_hz"] = rate
+            result.extra["samples_per_s"] = round(samples["hx_read"] / result.elapsed, 1)
+        return result
+
+    def control_loop(self, period=0.02, duration=2.0, jitter_budget=0.25):
+        """Pętla regulacji naciągu (MainApp.toggle_tension_control) z odczytem hx_read przez odpytywanie.
+
+        within_budget: średni okres w granicach 5% `period`, jitter p95 poniżej `jitter_budget` okresu,
+        bez przekroczeń okresu.
+        """
+        result = ScenarioResult(f"control_loop_{int(period * 1000)}ms")
+
+        def read():
+            response = self._timed_transact(result, "hx_read")
+            return parse_reply(response).number if response else None
+
+        def write(value):
+            self._timed_transact(result, f"pot_1_{value}", expected=value)
+
+        controller = PIDController(kp=0.01, ki=0.1, kd=0.0, setpoint=8000.0, rate_limit=200.0)
+        loop = TensionControlLoop(controller, read, write, period=period)
+        start = time.perf_counter()
+        loop.start(initial_output=0)
+        time.sleep(duration)
+        loop.stop()
+        result.elapsed = time.perf_counter() - start
+        stats = loop.stats()
+        result.extra["loop"] = stats
+        period_ms = period * 1000
+        result.extra["within_budget"] = (
+            stats["interval_ms"]["mean"] is not None
+            and abs(stats["interval_ms"]["mean"] - period_ms) <= 0.05 * period_ms
+            and stats["jitter_ms"]["p95"] <= jitter_budget * period_ms
+            and stats["overruns"] == 0)
+        return result
+
+
+def multi_port_scaling(port_counts, simulator_options, duration=1.0, max_in_flight=8):
+    """Odczyt całej tabeli w pętli na N symulatorach naraz przez DeviceManager.
+
+    Zwraca przepustowość łączną i opóźnienie serii na port - dodanie portu nie powinno spowalniać pozostałych.
+    """
+    from device_simulator import WinderSimulator
+    results = {}
+    for count in port_counts:
+        simulators = [WinderSimulator(seed=index, **simulator_options) for index in range(count)]
+        manager = DeviceManager()
+        try:
+            for index, simulator in enumerate(simulators):
+                manager.add(f"port_{index + 1}")
+                manager.connect(f"port_{index + 1}", simulator.start())
+
+            def sweep_loop(handler):
+                sweeps = []
+                deadline = time.perf_counter() + duration
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    handler.send_batch(READ_COMMANDS, max_in_flight=max_in_flight)
+                    sweeps.append(time.perf_counter() - start)
+                return sweeps
+
+            start = time.perf_counter()
+            # Ta sama ścieżka co MainApp.run_in_background: wątek roboczy każdej nawijarki z DeviceManager
+            futures = {name: manager.submit(name, sweep_loop) for name in manager.names()}
+            sweeps = {name: future.result() for name, future in futures.items()}
+            elapsed = time.perf_counter() - start
+        finally:
+            manager.close()
+            for simulator in simulators:
+                simulator.stop()
+        total = sum(len(values) for values in sweeps.values()) * len(READ_COMMANDS)
+        results[f"multi_port_{count}"] = {
+            "ports": count,
+            "elapsed_s": round(elapsed, 4),
+            "commands_per_s": round(total / elapsed, 1),
+            "sweep_ms_p50": {name: round(percentile(sorted(values), 0.5) * 1000, 3)
+                             for name, values in sweeps.items() if values},
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark protokołu szeregowego nawijarki.")
+    parser.add_argument("--port", help="port urządzenia; bez tej opcji uruchamiany jest symulator")
+    parser.add_argument("--latency", type=float, default=0.002, help="opóźnienie symulatora [s]")
+    parser.add_argument("--jitter", type=float, default=0.001, help="jitter symulatora [s]")
+    parser.add_argument("--drop", type=float, default=0.0, help="odsetek gubionych odpowiedzi w symulatorze")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=1.0, help="czas oczekiwania na odpowiedź [s]")
+    parser.add_argument("--ports", type=int, default=4,
+                        help="maksymalna liczba symulatorów w teście skalowania (tylko bez --port)")
+    parser.add_argument("--output", help="plik JSON z wynikami (domyślnie bench_results/benchmark_<czas>.json)")
+    args = parser.parse_args()
+
+    simulator = None
+    port = args.port
+    if port is None:
+        from device_simulator import WinderSimulator
+        simulator = WinderSimulator(latency=args.latency, jitter=args.jitter, drop_rate=args.drop, seed=0)
+        port = simulator.start()
+
+    handler = SerialHandler()
+    handler.response_timeout = args.timeout
+    handler.connect(port)
+    try:
+        results = ProtocolBenchmark(handler, iterations=args.iterations).run_all()
+        diagnostics = handler.diagnostics.snapshot()
+    finally:
+        handler.disconnect()
+        if simulator is not None:
+            simulator.stop()
+
+    if args.port is None and args.ports > 1:
+        counts = sorted({1, *[2 ** i for i in range(1, args.ports.bit_length())], args.ports})
+        results.update(multi_port_scaling(counts, {"latency": args.latency, "jitter": args.jitter,
+                                                   "drop_rate": args.drop}))
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "config": {
+            "port": args.port or "simulator",
+            "baudrate": handler.baudrate,
+            "iterations": args.iterations,
+            "timeout_s": args.timeout,
+            "simulator": None if args.port else {"latency_s": args.latency, "jitter_s": args.jitter,
+                                                 "drop_rate": args.drop},
+        },
+        "results": results,
+        # Liczniki SerialHandler per komenda, m.in. powtórzenia po przekroczeniu czasu
+        "diagnostics": diagnostics,
+    }
+
+    output = args.output or f"bench_results/benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+
+    for name, result in results.items():
+        if "latency_ms" not in result:
+            print(f"{name:28s} {result['commands_per_s']} kom/s, seria p50 na port: {result['sweep_ms_p50']}")
+            continue
+        latency = result["latency_ms"]
+        print(f"{name:28s} p50={latency['p50']} ms p95={latency['p95']} ms p99={latency['p99']} ms "
+              f"{result['commands_per_s']} kom/s timeout={result['timeout_rate']:.2%} "
+              f"powt.={result['retry_rate']:.2%} błędne={result['invalid_rate']:.2%}")
+        if result.get("within_budget") is False:
+            print(f"{'':28s} UWAGA: okres lub jitter pętli regulacji poza budżetem")
+    print(f"Zapisano: {output}")
+
+
+if __name__ == "__main__":
+    main()
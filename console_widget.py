@@ -0,0 +1,113 @@
+import threading
+import tkinter as tk
+from collections import deque
+from tkinter import ttk
+
+
+class ConsoleView:
+    """Konsola tekstowa o ograniczonej długości.
+
+    append() można wołać z dowolnego wątku - wpisy czekają w kolejce i trafiają do widżetu
+    jednym wstawieniem na klatkę. Widżet i historia przechowują najwyżej `max_lines` linii.
+    """
+
+    LEVEL_ALL = "Wszystkie"
+    LEVEL_INFO = "Informacje"
+    LEVEL_ERROR = "Błędy"
+    ERROR_MARKERS = ("Błąd", "Nieprawidłowa odpowiedź", "Nie otrzymano odpowiedzi")
+
+    def __init__(self, parent, max_lines=2000, height=15, fps=20):
+        self.max_lines = max_lines
+        self.interval = max(1, int(1000 / fps))
+        self._history = deque(maxlen=max_lines)  # (poziom, wiadomość) - do ponownego filtrowania
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._shown_lines = 0
+        self._after_id = None
+
+        self.frame = ttk.Frame(parent)
+        filter_bar = ttk.Frame(self.frame)
+        filter_bar.pack(fill=tk.X)
+        self.level_var = tk.StringVar(value=self.LEVEL_ALL)
+        level_box = ttk.Combobox(
+            filter_bar, textvariable=self.level_var, state="readonly", width=12,
+            values=(self.LEVEL_ALL, self.LEVEL_INFO, self.LEVEL_ERROR)
+        )
+        level_box.pack(side=tk.LEFT, padx=(0, 5))
+        level_box.bind("<<ComboboxSelected>>", lambda event: self.refilter())
+        ttk.Label(filter_bar, text="Filtr:").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        filter_entry = ttk.Entry(filter_bar, textvariable=self.filter_var, width=15)
+        filter_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        filter_entry.bind("<KeyRelease>", lambda event: self.refilter())
+        ttk.Button(filter_bar, text="Wyczyść", command=self.clear).pack(side=tk.LEFT)
+
+        self.text = tk.Text(self.frame, height=height, state="disabled")
+        self.text.pack(fill=tk.BOTH, expand=True, pady=5)
+        self.text.bind("<Destroy>", self._on_destroy, add="+")
+
+        self._after_id = self.text.after(self.interval, self._flush)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def append(self, message, level=None):
+        """Dodaje wpis do kolejki; poziom rozpoznawany z treści, jeśli nie podano."""
+        if level is None:
+            level = self.LEVEL_ERROR if message.startswith(self.ERROR_MARKERS) else self.LEVEL_INFO
+        with self._lock:
+            self._pending.append((level, message))
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+        self._history.clear()
+        self._replace_text("")
+
+    def refilter(self):
+        """Odbudowuje zawartość widżetu z historii według bieżących filtrów."""
+        lines = [message for level, message in self._history if self._matches(level, message)]
+        self._replace_text("".join(f"{message}\n" for message in lines))
+        self._shown_lines = len(lines)
+
+    def _matches(self, level, message):
+        selected = self.level_var.get()
+        if selected != self.LEVEL_ALL and level != selected:
+            return False
+        text_filter = self.filter_var.get()
+        return not text_filter or text_filter in message
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, deque()
+        if pending:
+            self._history.extend(pending)
+            # Przy zalewie wpisów i tak zostanie tylko max_lines ostatnich
+            lines = [message for level, message in list(pending)[-self.max_lines:] if self._matches(level, message)]
+            if lines:
+                self._insert_lines(lines)
+        self._after_id = self.text.after(self.interval, self._flush)
+
+    def _insert_lines(self, lines):
+        self.text.config(state="normal")
+        self.text.insert(tk.END, "".join(f"{message}\n" for message in lines))
+        self._shown_lines += len(lines)
+        excess = self._shown_lines - self.max_lines
+        if excess > 0:
+            self.text.delete("1.0", f"{excess + 1}.0")
+            self._shown_lines = self.max_lines
+        self.text.config(state="disabled")
+        self.text.see(tk.END)
+
+    def _replace_text(self, content):
+        self.text.config(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert(tk.END, content)
+        self.text.config(state="disabled")
+        self.text.see(tk.END)
+        self._shown_lines = content.count("\n")
+
+    def _on_destroy(self, event):
+        if self._after_id is not None:
+            self.text.after_cancel(self._after_id)
+            self._after_id = None
@@ -0,0 +1,35 @@
+# Lista komend odczytu (kolejność jak w tabeli "Parametry")
+READ_COMMANDS = [
+    "smc124_clk", "smc124_dir", "smc124_en", "sm2_sd", "sm2_ccw", "sm2_cw",
+    "sm1_sd", "sm1_ccw", "sm1_cw", "led_blue", "led_green", "zero_1",
+    "zero_2", "pot_1", "pot_2", "pot_3", "pot_4", "pot_wp", "hx_gain",
+    "hx_read", "encoder_1", "encoder_2"
+]
+
+# Komendy zapisu wraz z konfiguracją kontrolek okna Debug
+WRITE_COMMANDS = {
+    "smc124_clk": {"type": "spinbox", "min": 0, "max": 100, "default": 50},
+    "smc124_dir": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
+    "smc124_en": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
+    "pot_wp": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
+    "pot_1": {"type": "spinbox", "min": 0, "max": 255, "default": 255},
+    "pot_2": {"type": "spinbox", "min": 0, "max": 255, "default": 255},
+    "sm1_sd": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
+    "sm1_ccw": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
+    "sm1_cw": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
+    "pot_3": {"type": "spinbox", "min": 0, "max": 255, "default": 255},
+    "pot_4": {"type": "spinbox", "min": 0, "max": 255, "default": 255},
+    "sm2_sd": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
+    "sm2_ccw": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
+    "sm2_cw": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
+    "hx_gain": {"type": "spinbox_set", "Option1": 32, "Option2": 64, "Option3": 128, "default": 64},
+    "led_green": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
+    "led_blue": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
+    "encoder_1": {"type": "spinbox", "min": 0, "max": 255255, "default": 0},
+    "encoder_2": {"type": "spinbox", "min": 0, "max": 255255, "default": 0}
+}
+
+
+# Komendy zapisu wykonujące akcję, a nie ustawiające rejestr (np. zerowanie licznika enkodera).
+# Wartość w urządzeniu zmienia się sama, więc takich zapisów nie wolno pomijać ani zapamiętywać.
+ACTION_COMMANDS = {"encoder_1", "encoder_2"}
@@ -0,0 +1,75 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from serial_communication import SerialHandler
+
+
+class DeviceManager:
+    """Połączenia z kilkoma nawijarkami: nazwa -> SerialHandler.
+
+    Każde połączenie ma własny wątek odczytu (SerialHandler) i własny wątek roboczy do operacji
+    blokujących (submit), więc wolna odpowiedź jednej maszyny nie opóźnia pozostałych.
+    """
+
+    def __init__(self, handler_factory=SerialHandler):
+        self.handler_factory = handler_factory
+        self._handlers = {}
+        self._workers = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, handler=None):
+        with self._lock:
+            if name in self._handlers:
+                raise Exception(f"Nawijarka {name} jest już dodana.")
+            handler = handler if handler is not None else self.handler_factory()
+            self._handlers[name] = handler
+            self._workers[name] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"winder-{name}")
+        return handler
+
+    def remove(self, name):
+        with self._lock:
+            handler = self._handlers.pop(name, None)
+            worker = self._workers.pop(name, None)
+        if worker is not None:
+            worker.shutdown(wait=False, cancel_futures=True)
+        if handler is not None and handler.is_connected():
+            handler.disconnect()
+
+    def get(self, name):
+        with self._lock:
+            return self._handlers[name]
+
+    def names(self):
+        with self._lock:
+            return list(self._handlers)
+
+    def port_owner(self, port):
+        """Nazwa nawijarki połączonej z portem lub None."""
+        with self._lock:
+            for name, handler in self._handlers.items():
+                if handler.port_name == port and handler.is_connected():
+                    return name
+        return None
+
+    def connect(self, name, port):
+        owner = self.port_owner(port)
+        if owner is not None and owner != name:
+            raise Exception(f"Port {port} jest już używany przez: {owner}.")
+        self.get(name).connect(port)
+
+    def disconnect_all(self):
+        for name in self.names():
+            handler = self.get(name)
+            if handler.is_connected():
+                handler.disconnect()
+
+    def close(self):
+        for name in self.names():
+            self.remove(name)
+
+    def submit(self, name, func, *args):
+        """Wykonuje func(handler, *args) w wątku roboczym danej nawijarki. Zwraca Future."""
+        with self._lock:
+            handler = self._handlers[name]
+            worker = self._workers[name]
+        return worker.submit(func, handler, *args)
@@ -0,0 +1,223 @@
+import argparse
+import heapq
+import itertools
+import os
+import random
+import select
+import threading
+import time
+import tty
+
+from device_commands import READ_COMMANDS, WRITE_COMMANDS
+from line_protocol import LineFramer
+
+
+class WinderSimulator:
+    """Wirtualna nawijarka na pseudoterminalu (tylko Linux).
+
+    Odpowiada tym samym protokołem tekstowym co urządzenie:
+    - odczyt "nazwa" -> "nazwa val=<wartość>",
+    - zapis "nazwa_wartość" -> "nazwa_wartość done ok",
+    - "stream_<Hz>" włącza (0 wyłącza) wysyłanie linii hx_read i encoder_1 bez zapytania.
+    Odpowiedzi wychodzą w kolejności komend po czasie latency + losowy jitter;
+    drop_rate to prawdopodobieństwo zgubienia odpowiedzi.
+    """
+
+    def __init__(self, latency=0.002, jitter=0.0, drop_rate=0.0, seed=None,
+                 encoder_speed=2000.0, tension_offset=8000.0, tension_gain=40.0, tension_noise=5.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.encoder_speed = encoder_speed  # Impulsy enkodera na sekundę przy pot = 255
+        self.tension_offset = tension_offset  # Surowy odczyt belki bez naciągu
+        self.tension_gain = tension_gain  # Zmiana odczytu na jednostkę różnicy prędkości silników
+        self.tension_noise = tension_noise
+        self.tension_tau = 0.2  # Stała czasowa narastania naciągu [s]
+        self.random = random.Random(seed)
+
+        self.registers = {command: 0 for command in READ_COMMANDS}
+        for command, config in WRITE_COMMANDS.items():
+            self.registers[command] = config["default"]
+        self.registers["pot_wp"] = 0
+        self.encoders = {1: 0.0, 2: 0.0}
+        self.tension = tension_offset
+        self.stream_rate = 0
+
+        self.port = None
+        self.received = 0
+        self.sent = 0
+        self.dropped = 0
+        self._master = None
+        self._slave = None
+        self._replies = []  # Kopiec (czas wysłania, kolejność, linia)
+        self._last_due = 0.0
+        self._counter = itertools.count()
+        self._lock = threading.Condition()
+        self._state_lock = threading.Lock()
+        self._last_physics = time.monotonic()
+        self._running = False
+        self._threads = []
+
+    def start(self):
+        """Otwiera pseudoterminal i zwraca ścieżkę portu dla SerialHandler.connect."""
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._running = True
+        self._last_physics = time.monotonic()
+        for target in (self._read_loop, self._write_loop, self._stream_loop):
+            thread = threading.Thread(target=target, name=f"simulator-{target.__name__}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self.port
+
+    def stop(self):
+        self._running = False
+        with self._lock:
+            self._lock.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=1)
+        self._threads = []
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        self._master = self._slave = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def handle_line(self, line):
+        """Zwraca odpowiedź urządzenia na jedną linię komendy (bez opóźnień i gubienia)."""
+        with self._state_lock:
+            self._update_physics()
+            if line in self.registers:
+                return f"{line} val={self._read_register(line)}"
+            name, _, value = line.rpartition("_")
+            if name == "stream" and value.isdigit():
+                self.stream_rate = int(value)
+                return f"{line} done ok"
+            if name in WRITE_COMMANDS and value.lstrip("-").isdigit():
+                self._write_register(name, int(value))
+                return f"{line} done ok"
+            return f"{line} error"
+
+    def _read_register(self, name):
+        if name == "hx_read":
+            return int(self.tension + self.random.gauss(0, self.tension_noise))
+        if name in ("encoder_1", "encoder_2"):
+            return int(self.encoders[int(name[-1])])
+        return self.registers[name]
+
+    def _write_register(self, name, value):
+        self.registers[name] = value
+        if name in ("encoder_1", "encoder_2"):
+            self.encoders[int(name[-1])] = float(value)
+
+    def _motor_speed(self, sm):
+        """Prędkość silnika w impulsach enkodera na sekundę (ze znakiem kierunku)."""
+        cw = self.registers[f"sm{sm}_cw"]
+        ccw = self.registers[f"sm{sm}_ccw"]
+        if cw == ccw:
+            return 0.0
+        direction = 1 if cw else -1
+        return direction * self.registers[f"pot_{sm}"] / 255 * self.encoder_speed
+
+    def _update_physics(self):
+        now = time.monotonic()
+        dt = now - self._last_physics
+        self._last_physics = now
+        speed_1 = self._motor_speed(1)
+        speed_2 = self._motor_speed(2)
+        for sm, speed in ((1, speed_1), (2, speed_2)):
+            self.encoders[sm] = max(0.0, self.encoders[sm] + speed * dt)
+        # Naciąg rośnie, gdy nawijanie (SM1) jest szybsze od podawania (SM2) - inercja pierwszego rzędu
+        target = self.tension_offset + self.tension_gain * (abs(speed_1) - abs(speed_2)) / self.encoder_speed * 255
+        self.tension += (target - self.tension) * min(1.0, dt / self.tension_tau)
+
+    def _queue_reply(self, line, delay):
+        with self._lock:
+            # Urządzenie przetwarza komendy po kolei - odpowiedź nie wyprzedzi poprzedniej
+            due = max(time.monotonic() + delay, self._last_due)
+            self._last_due = due
+            heapq.heappush(self._replies, (due, next(self._counter), line))
+            self._lock.notify()
+
+    def _read_loop(self):
+        framer = LineFramer()
+        while self._running:
+            ready, _, _ = select.select([self._master], [], [], 0.1)
+            if not ready:
+                continue
+            try:
+                data = os.read(self._master, 4096)
+            except OSError:
+                break
+            for line in framer.feed(data):
+                self.received += 1
+                reply = self.handle_line(line)
+                if self.drop_rate and self.random.random() < self.drop_rate:
+                    self.dropped += 1
+                    continue
+                self._queue_reply(reply, self.latency + self.random.uniform(0, self.jitter))
+
+    def _write_loop(self):
+        while True:
+            with self._lock:
+                while self._running and (not self._replies or self._replies[0][0] > time.monotonic()):
+                    timeout = self._replies[0][0] - time.monotonic() if self._replies else None
+                    self._lock.wait(timeout)
+                if not self._running:
+                    return
+                _, _, line = heapq.heappop(self._replies)
+            self._write(line)
+
+    def _stream_loop(self):
+        next_tick = time.monotonic()
+        while self._running:
+            rate = self.stream_rate
+            if not rate:
+                time.sleep(0.01)
+                next_tick = time.monotonic()
+                continue
+            next_tick += 1.0 / rate
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            if self.stream_rate:
+                self._queue_reply(self.handle_line("hx_read"), 0)
+                self._queue_reply(self.handle_line("encoder_1"), 0)
+
+    def _write(self, line):
+        try:
+            os.write(self._master, (line + "\n").encode('utf-8'))
+            self.sent += 1
+        except OSError:
+            self._running = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Symulator nawijarki na pseudoterminalu.")
+    parser.add_argument("--latency", type=float, default=0.002, help="opóźnienie odpowiedzi [s]")
+    parser.add_argument("--jitter", type=float, default=0.0, help="maksymalny losowy dodatek do opóźnienia [s]")
+    parser.add_argument("--drop", type=float, default=0.0, help="prawdopodobieństwo zgubienia odpowiedzi")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    simulator = WinderSimulator(latency=args.latency, jitter=args.jitter, drop_rate=args.drop, seed=args.seed)
+    port = simulator.start()
+    print(f"Symulator nawijarki działa na porcie: {port} (Ctrl+C kończy)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
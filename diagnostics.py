@@ -0,0 +1,128 @@
+import bisect
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from device_commands import WRITE_COMMANDS
+
+# Górne granice przedziałów histogramu opóźnień [ms]; ostatni przedział jest otwarty
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000)
+
+
+def command_name(command):
+    """Nazwa rejestru dla komendy: "pot_1_100" -> "pot_1", komendy odczytu bez zmian."""
+    name, _, value = command.rpartition("_")
+    if name and value.lstrip("-").isdigit() and (name in WRITE_COMMANDS or name == "stream"):
+        return name
+    return command
+
+
+class CommandStats:
+    """Liczniki jednej komendy: histogram opóźnień, powtórzenia, błędne odpowiedzi, przekroczenia czasu."""
+
+    def __init__(self):
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.retries = 0
+        self.invalid = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def add_latency(self, latency_ms):
+        self.histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+        if latency_ms > self.max_ms:
+            self.max_ms = latency_ms
+
+    def percentile(self, fraction):
+        """Przybliżony percentyl [ms] - górna granica przedziału histogramu."""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.histogram):
+            cumulative += bucket_count
+            if cumulative >= target:
+                bound = LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else self.max_ms
+                return round(min(bound, self.max_ms), 3)
+        return round(self.max_ms, 3)
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "retries": self.retries,
+            "invalid": self.invalid,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "histogram": {
+                **{f"<={bound}": count for bound, count in zip(LATENCY_BUCKETS_MS, self.histogram)},
+                f">{LATENCY_BUCKETS_MS[-1]}": self.histogram[-1],
+            },
+        }
+
+
+class Diagnostics:
+    """Statystyki komunikacji per komenda, bezpieczne dla wielu wątków."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.started = time.time()
+
+    def _get(self, command):
+        name = command_name(command)
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = CommandStats()
+        return stats
+
+    def record_latency(self, command, seconds):
+        with self._lock:
+            self._get(command).add_latency(seconds * 1000)
+
+    def record_retry(self, command):
+        with self._lock:
+            self._get(command).retries += 1
+
+    def record_invalid(self, command):
+        with self._lock:
+            self._get(command).invalid += 1
+
+    def record_timeout(self, command):
+        with self._lock:
+            self._get(command).timeouts += 1
+
+    def record_error(self, command):
+        with self._lock:
+            self._get(command).errors += 1
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.started = time.time()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+                "taken": datetime.now().isoformat(timespec="seconds"),
+                "commands": {name: stats.to_dict() for name, stats in sorted(self._stats.items())},
+            }
+
+    def export_json(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.snapshot(), file, indent=2, ensure_ascii=False)
+        return path
@@ -1,63 +1,63 @@
 import tkinter as tk
-import os
 import threading
-import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from tkinter import ttk, messagebox
 from serial_communication import SerialHandler
+from ring_buffer import RingSeries
+from ui_dispatcher import UiDispatcher
+from poll_scheduler import PollScheduler
+from log_writer import AsyncLogWriter
+from console_widget import ConsoleView
+from device_commands import READ_COMMANDS, WRITE_COMMANDS
+from shared_connection import SharedConnection, PRIORITY_DIAGNOSTIC
+from line_protocol import parse_reply, STATUS_VALUE
+from signal_filters import FILTER_PRESETS, create_filter
 
 
 class Interface:
-    def __init__(self, root):
+    def __init__(self, root, connection=None):
         self.root = root
         self.root.title("Nawijarka Światłowodów")
-        self.serial_handler = SerialHandler()
+        # Okno otwarte z okna głównego używa jego połączenia; samodzielnie - własnego
+        self.shared_connection = connection is not None
+        self.connection = connection if connection is not None else SharedConnection(SerialHandler())
+        self.serial_handler = self.connection.serial_handler
+        # Aktualizacje widżetów z wątków roboczych trafiają do wątku Tk przez kolejkę
+        self.ui = UiDispatcher(self.root)
 
         # Inicjalizacja logów
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        os.makedirs("logs", exist_ok=True)
         self.log_file = f"logs/log_{timestamp}.txt"
         self.error_file = f"logs/errors_{timestamp}.txt"
 
-        with open(self.log_file, 'w') as log:
-            log.write(f"Log aplikacji rozpoczęty: {datetime.now()}\n")
-        with open(self.error_file, 'w') as err_log:
-            err_log.write(f"Log błędów rozpoczęty: {datetime.now()}\n")
-
-        # Lista komend odczytu
-        self.read_commands = [
-            "smc124_clk", "smc124_dir", "smc124_en", "sm2_sd", "sm2_ccw", "sm2_cw",
-            "sm1_sd", "sm1_ccw", "sm1_cw", "led_blue", "led_green", "zero_1",
-            "zero_2", "pot_1", "pot_2", "pot_3", "pot_4", "pot_wp", "hx_gain",
-            "hx_read", "encoder_1", "encoder_2"
-        ]
-
-        self.write_commands = {
-            "smc124_clk": {"type": "spinbox", "min": 0, "max": 100, "default": 50},
-            "smc124_dir": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
-            "smc124_en": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
-            "pot_wp": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
-            "pot_1": {"type": "spinbox", "min": 0, "max": 255, "default": 255},
-            "pot_2": {"type": "spinbox", "min": 0, "max": 255, "default": 255},
-            "sm1_sd": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
-            "sm1_ccw": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
-            "sm1_cw": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
-            "pot_3": {"type": "spinbox", "min": 0, "max": 255, "default": 255},
-            "pot_4": {"type": "spinbox", "min": 0, "max": 255, "default": 255},
-            "sm2_sd": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
-            "sm2_ccw": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
-            "sm2_cw": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
-            "hx_gain": {"type": "spinbox_set", "Option1": 32, "Option2": 64, "Option3": 128, "default": 64},
-            "led_green": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
-            "led_blue": {"type": "spinbox", "min": 0, "max": 1, "default": 0},
-            "encoder_1": {"type": "spinbox", "min": 0, "max": 255255, "default": 0},
-            "encoder_2": {"type": "spinbox", "min": 0, "max": 255255, "default": 0}
-        }
+        # Zapis do plików w tle, partiami, z rotacją wg rozmiaru
+        self.log_writer = AsyncLogWriter(self.log_file, header=f"Log aplikacji rozpoczęty: {datetime.now()}")
+        self.error_writer = AsyncLogWriter(self.error_file, header=f"Log błędów rozpoczęty: {datetime.now()}")
 
+        # Lista komend odczytu i zapisu
+        self.read_commands = list(READ_COMMANDS)
+        self.write_commands = dict(WRITE_COMMANDS)
+
+
+        self.batch_running = False
+        self.batch_in_flight = 8  # Liczba komend "Wyślij wszystkie" wysłanych bez czekania na odpowiedź
+        # Komendy z przycisków i konsoli wykonywane po kolei w tle - okno nie czeka na odpowiedź urządzenia
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="debug-worker")
+
+        # Autoupdate: częstotliwość [Hz] i priorytet odpytywania - pozostałe komendy 1 Hz, priorytet 0
+        self.autoupdate_rates = {"hx_read": 5, "encoder_1": 5, "encoder_2": 5}
+        self.autoupdate_priorities = {"hx_read": 1, "encoder_1": 1, "encoder_2": 1}
+        self.poll_scheduler = PollScheduler(self.poll_command)
+        # Odczyty rzadko zmieniających się rejestrów są ważne przez kilka sekund (wspólne z oknem głównym)
+        self.read_cache = self.connection.read_cache
+        # Filtry dwóch kolumn tabeli (domyślnie dawne "Średnia (5)" i "Średnia (10)")
+        self.table_filter_specs = ["ma:5", "ma:10"]
+        self.root.bind("<Destroy>", self.on_destroy, add="+")
 
         # Indeks aktualnej kolumny
         self.current_column = 0
-        self.column_number = 5
+        self.column_number = 6
 
         # Konfiguracja siatki dla kolumn
         self.root.columnconfigure(0, weight=1)
@@ -65,6 +65,7 @@ class Interface:
         self.root.columnconfigure(2, weight=1)
         self.root.columnconfigure(3, weight=2)
         self.root.columnconfigure(4, weight=2)
+        self.root.columnconfigure(5, weight=2)
 
         # Tworzenie interfejsu
         self.create_ui()
@@ -75,6 +76,7 @@ class Interface:
         self.add_section(self.create_write_buttons_section)
         self.add_section(self.create_table_section)
         self.add_section(self.create_console_section)
+        self.add_section(self.create_diagnostics_section)
 
     def add_section(self, section_function):
         frame = ttk.Frame(self.root, padding="5")
@@ -94,7 +96,8 @@ class Interface:
         scale.pack(fill=tk.X, padx=5, pady=5)
 
         ttk.Button(
-            parent, text="Wyślij", command=lambda: self.send_write_and_update(command, value.get())
+            parent, text="Wyślij",
+            command=lambda: self.run_in_background(self.send_write_and_update, command, value.get())
         ).pack(pady=5)
 
     def create_switch_control(self, parent, command, config):
@@ -105,7 +108,8 @@ class Interface:
         switch.pack(pady=5)
 
         ttk.Button(
-            parent, text=command, command=lambda: self.send_write_and_update(command, value.get())
+            parent, text=command,
+            command=lambda: self.run_in_background(self.send_write_and_update, command, value.get())
         ).pack(pady=5)
 
     def create_spinbox_control(self, parent, command, config):
@@ -122,7 +126,8 @@ class Interface:
         spinbox.grid(row=0, column=0, padx=5, pady=5, sticky="w")
 
         ttk.Button(
-            container, text=command, command=lambda: self.send_write_and_update(command, value.get())
+            container, text=command,
+            command=lambda: self.run_in_background(self.send_write_and_update, command, value.get())
         ).grid(row=0, column=1, padx=5, pady=5, sticky="w")
 
     def create_spinbox_set_control(self, parent, command, config):
@@ -138,7 +143,8 @@ class Interface:
         spinbox.grid(row=0, column=0, padx=5, pady=5, sticky="w")
 
         ttk.Button(
-            container, text=command, command=lambda: self.send_write_and_update(command, value.get())
+            container, text=command,
+            command=lambda: self.run_in_background(self.send_write_and_update, command, value.get())
         ).grid(row=0, column=1, padx=5, pady=5, sticky="w")
 
     def create_port_section(self, parent):
@@ -150,40 +156,131 @@ class Interface:
         ttk.Button(parent, text="Odśwież listę portów", command=self.refresh_ports).pack(pady=5)
         self.connect_button = ttk.Button(parent, text="Połącz", command=self.toggle_connection)
         self.connect_button.pack(pady=5)
+        if self.shared_connection:
+            # Port otwiera i zamyka okno główne - tu tylko informacja
+            self.port_var.set(self.serial_handler.port_name or "")
+            self.port_dropdown.config(state="disabled")
+            self.connect_button.config(state="disabled")
+            ttk.Label(parent, text="Połączenie współdzielone z oknem głównym").pack(pady=5)
 
     def create_console_section(self, parent):
         ttk.Label(parent, text="Konsola").pack(anchor="w", pady=5)
-        self.console_output = tk.Text(parent, height=15, state="disabled")
-        self.console_output.pack(fill=tk.BOTH, expand=True, pady=5)
+        self.console = ConsoleView(parent, height=15)
+        self.console.pack(fill=tk.BOTH, expand=True, pady=5)
         self.console_entry = ttk.Entry(parent)
         self.console_entry.pack(fill=tk.X, pady=5)
         self.console_entry.bind("<Return>", self.on_enter_command)
 
+    def create_diagnostics_section(self, parent):
+        ttk.Label(parent, text="Diagnostyka").pack(anchor="w", pady=4)
+        columns = ("komenda", "n", "p50", "p95", "p99", "max", "powt", "bledne", "timeout")
+        headings = ("Komenda", "N", "p50 [ms]", "p95 [ms]", "p99 [ms]", "max [ms]", "Powt.", "Błędne", "Timeout")
+        self.diagnostics_tree = ttk.Treeview(parent, columns=columns, show="headings", height=20)
+        for col, text in zip(columns, headings):
+            self.diagnostics_tree.heading(col, text=text)
+            self.diagnostics_tree.column(col, width=90 if col == "komenda" else 55, anchor="center")
+        self.diagnostics_tree.pack(fill=tk.BOTH, expand=True)
+        self.diagnostics_rows = {}  # Komenda -> id wiersza
+
+        buttons = ttk.Frame(parent)
+        buttons.pack(fill=tk.X, pady=5)
+        ttk.Button(buttons, text="Eksportuj", command=self.export_diagnostics).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons, text="Zeruj", command=self.reset_diagnostics).pack(side=tk.LEFT, padx=5)
+
+        self.diagnostics_after_id = None
+        self.refresh_diagnostics()
+
+    def refresh_diagnostics(self):
+        snapshot = self.serial_handler.diagnostics.snapshot()
+        for command, stats in snapshot["commands"].items():
+            values = (
+                command, stats["count"], stats["p50_ms"], stats["p95_ms"], stats["p99_ms"], stats["max_ms"],
+                stats["retries"], stats["invalid"], stats["timeouts"],
+            )
+            values = tuple("" if value is None else value for value in values)
+            row = self.diagnostics_rows.get(command)
+            if row is None:
+                self.diagnostics_rows[command] = self.diagnostics_tree.insert("", "end", values=values)
+            else:
+                self.diagnostics_tree.item(row, values=values)
+        self.diagnostics_after_id = self.root.after(1000, self.refresh_diagnostics)
+
+    def export_diagnostics(self):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        try:
+            path = self.serial_handler.diagnostics.export_json(f"logs/diagnostics_{timestamp}.json")
+            self.log_output(f"Zapisano diagnostykę: {path}")
+        except OSError as e:
+            self.log_output(f"Błąd zapisu diagnostyki: {e}")
+
+    def reset_diagnostics(self):
+        self.serial_handler.diagnostics.reset()
+        self.diagnostics_tree.delete(*self.diagnostics_tree.get_children())
+        self.diagnostics_rows = {}
+
     def create_table_section(self, parent):
         ttk.Label(parent, text="Parametry").pack(anchor="w", pady=4)
 
+        # Wybór filtrów dla kolumn tabeli - gotowe lub własne, np. "median:7"
+        filter_frame = ttk.Frame(parent)
+        filter_frame.pack(fill=tk.X)
+        self.table_filter_vars = []
+        for index, spec in enumerate(self.table_filter_specs):
+            ttk.Label(filter_frame, text=f"Filtr {index + 1}").pack(side=tk.LEFT, padx=2)
+            var = tk.StringVar(value=spec)
+            box = ttk.Combobox(filter_frame, textvariable=var, values=FILTER_PRESETS, width=12)
+            box.pack(side=tk.LEFT, padx=2)
+            box.bind("<<ComboboxSelected>>", lambda event, i=index: self.set_table_filter(i))
+            box.bind("<Return>", lambda event, i=index: self.set_table_filter(i))
+            self.table_filter_vars.append(var)
+
         # Tworzenie Treeview z dodatkowymi kolumnami
         self.tree = ttk.Treeview(
             parent,
-            columns=("lp", "nazwa_typ", "wartosc", "srednia_5", "srednia_10"),
+            columns=("lp", "nazwa_typ", "wartosc", "filtr_1", "filtr_2"),
             show="headings",
         )
         self.tree.heading("lp", text="Lp")
         self.tree.heading("nazwa_typ", text="Nazwa Typ")
         self.tree.heading("wartosc", text="Wartość")
-        self.tree.heading("srednia_5", text="Średnia (5)")
-        self.tree.heading("srednia_10", text="Średnia (10)")
 
         # Automatyczne dopasowanie szerokości kolumn
-        for col in ("lp", "nazwa_typ", "wartosc", "srednia_5", "srednia_10"):
+        for col in ("lp", "nazwa_typ", "wartosc", "filtr_1", "filtr_2"):
             self.tree.column(col, width=100, anchor="center")
 
         self.tree.pack(fill=tk.BOTH, expand=True)
 
         # Inicjalizacja danych dla tabeli
-        self.command_data = {cmd: [] for cmd in self.read_commands}
+        self.command_data = {cmd: RingSeries(100) for cmd in self.read_commands}  # Historia do inicjowania filtrów
+        self.table_filters = {}  # Komenda -> [filtr kolumny 1, filtr kolumny 2]
+        self.tree_rows = {}  # Komenda -> (id wiersza, lp)
+        self.pending_rows = {}  # Komenda -> (wartość, filtr 1, filtr 2) czekające na odświeżenie
+        self.table_lock = threading.Lock()
+        for index, spec in enumerate(self.table_filter_specs):
+            self.apply_table_filter(index, create_filter(spec))
         for i, command in enumerate(self.read_commands, start=1):
-            self.tree.insert("", "end", values=(i, command, "", "", ""))
+            self.tree_rows[command] = (self.tree.insert("", "end", values=(i, command, "", "", "")), i)
+
+    def set_table_filter(self, index):
+        var = self.table_filter_vars[index]
+        try:
+            table_filter = create_filter(var.get())
+        except ValueError as e:
+            self.log_output(f"Błąd: {e}")
+            var.set(self.table_filter_specs[index])
+            return
+        self.apply_table_filter(index, table_filter)
+
+    def apply_table_filter(self, index, table_filter):
+        self.table_filter_specs[index] = table_filter.spec
+        self.tree.heading(f"filtr_{index + 1}", text=table_filter.label)
+        with self.table_lock:
+            for command in self.read_commands:
+                filters = self.table_filters.setdefault(command, [None] * len(self.table_filter_specs))
+                command_filter = table_filter.spawn()
+                # Nowy filtr startuje z zapamiętaną historią odczytów, bez pustego okna
+                command_filter.prime(self.command_data[command].values())
+                filters[index] = command_filter
 
     def create_buttons_section(self, parent):
         ttk.Label(parent, text="Odczyt").pack(anchor="w", pady=5)
@@ -198,8 +295,9 @@ class Interface:
             frame.pack(fill=tk.X, pady=2, anchor="w")
 
             # Przycisk do ręcznego wysłania komendy
-            ttk.Button(frame, text=command, command=lambda cmd=command: self.send_and_update(cmd)).pack(side=tk.LEFT,
-                                                                                                        padx=5)
+            ttk.Button(frame, text=command,
+                       command=lambda cmd=command: self.run_in_background(self.send_and_update, cmd)).pack(side=tk.LEFT,
+                                                                                                            padx=5)
 
             # Checkbox
             self.check_vars[command] = tk.BooleanVar(value=False)
@@ -217,23 +315,24 @@ class Interface:
             self.stop_automatic_update(command)
 
     def start_automatic_update(self, command):
-        def update():
-            delay = 100  # Pierwsze opóźnienie
-            command_index = self.read_commands.index(command)  # Pobranie indeksu komendy
-            while self.check_vars[command].get():
-                self.send_and_update(command)
-                time.sleep(delay / 1000)  # Opóźnienie w sekundach
-                delay += 50  # Zwiększenie opóźnienia o 50 ms dla każdej iteracji
-
-                # Zresetowanie opóźnienia, jeśli przekroczy 1000 ms
-                if delay > 1000:
-                    delay = 100
-
-        # Rozpoczęcie wątku
-        threading.Thread(target=update, daemon=True).start()
+        # Wszystkie komendy odpytuje jeden wątek planisty
+        rate = self.autoupdate_rates.get(command, 1)
+        priority = self.autoupdate_priorities.get(command, 0)
+        self.poll_scheduler.add(command, rate, priority)
 
     def stop_automatic_update(self, command):
         self.check_vars[command].set(False)  # Resetuje stan checkboxa
+        self.poll_scheduler.remove(command)
+
+    def on_destroy(self, event):
+        if event.widget is self.root:
+            self.poll_scheduler.stop()
+            if self.diagnostics_after_id is not None:
+                self.root.after_cancel(self.diagnostics_after_id)
+                self.diagnostics_after_id = None
+            self.worker.shutdown(wait=False, cancel_futures=True)
+            self.log_writer.close()
+            self.error_writer.close()
 
     def create_write_buttons_section(self, parent):
 
@@ -254,7 +353,18 @@ class Interface:
                 self.create_spinbox_set_control(parent, command, config)
 
     def refresh_ports(self):
-        ports = self.serial_handler.get_available_ports()
+        # Wyszukiwanie portów w tle - lista uzupełniana po zakończeniu
+        threading.Thread(target=self.find_ports, daemon=True).start()
+
+    def find_ports(self):
+        try:
+            ports = self.serial_handler.get_available_ports()
+        except Exception as e:
+            self.log_output(f"Błąd wyszukiwania portów: {e}")
+            return
+        self.ui.post("ports", self.set_ports, ports)
+
+    def set_ports(self, ports):
         self.port_dropdown['values'] = ports
 
     def toggle_connection(self):
@@ -265,7 +375,7 @@ class Interface:
         else:
             port = self.port_var.get()
             try:
-                self.serial_handler.connect(port)
+                self.connection.connect(port)
                 self.connect_button.config(text="Rozłącz")
                 self.log_output(f"Połączono z {port} przy prędkości {self.serial_handler.baudrate} baud.")
             except Exception as e:
@@ -278,19 +388,17 @@ class Interface:
             return None
 
         try:
-            self.serial_handler.send_command(command)
             self.log_to_file(f"Wysłano komendę: {command}")
-            for attempt in range(3):
-                response = self.serial_handler.read_response()
-                if response:
-                    self.log_to_file(f"Odebrano wiadomość: {response}")
-                    if command.split('_')[0] in response and command in response:
-                        return response
-                    else:
-                        self.log_output(f"Nieprawidłowa odpowiedź: {response}")
-                        self.log_to_file(f"Nieprawidłowa odpowiedź dla komendy {command}: {response}", is_error=True)
-                        return response
-                self.log_output(f"Próba {attempt + 1} dla komendy {command} nie powiodła się.")
+            response = self.connection.transact(command, priority=PRIORITY_DIAGNOSTIC, client="debug")
+            if response:
+                self.log_to_file(f"Odebrano wiadomość: {response}")
+                if not (command.split('_')[0] in response and command in response):
+                    self.log_output(f"Nieprawidłowa odpowiedź: {response}")
+                    self.serial_handler.diagnostics.record_invalid(command)
+                    self.log_to_file(f"Nieprawidłowa odpowiedź dla komendy {command}: {response}", is_error=True)
+                else:
+                    self.read_cache.put(command, response)
+                return response
             self.log_output(f"Nie otrzymano odpowiedzi na komendę: {command}")
             self.log_to_file(f"Nie otrzymano odpowiedzi na komendę: {command}. Odpowiedź: Brak", is_error=True)
             return None
@@ -307,21 +415,18 @@ class Interface:
 
         full_command = f"{command}_{value}"  # Tworzenie pełnej komendy
         try:
-            self.serial_handler.send_command(full_command)
             self.log_to_file(f"Wysłano komendę: {full_command}")
-            for attempt in range(3):
-                response = self.serial_handler.read_response()
-                if response:
-                    self.log_to_file(f"Odebrano wiadomość: {response}")
-                    # Weryfikacja odpowiedzi
-                    if command in response and f"{value}" in response:
-                        return response
-                    else:
-                        self.log_output(f"Nieprawidłowa odpowiedź: {response}")
-                        self.log_to_file(f"Nieprawidłowa odpowiedź dla komendy {full_command}: {response}",
-                                         is_error=True)
-                        return response
-                self.log_output(f"Próba {attempt + 1} dla komendy {full_command} nie powiodła się.")
+            # Zapis odświeża wspólną kopię rejestrów i pamięć odczytów obu okien
+            response = self.connection.write(command, value, client="debug")
+            if response:
+                self.log_to_file(f"Odebrano wiadomość: {response}")
+                # Weryfikacja odpowiedzi
+                if not (command in response and f"{value}" in response):
+                    self.log_output(f"Nieprawidłowa odpowiedź: {response}")
+                    self.serial_handler.diagnostics.record_invalid(command)
+                    self.log_to_file(f"Nieprawidłowa odpowiedź dla komendy {full_command}: {response}",
+                                     is_error=True)
+                return response
             self.log_output(f"Nie otrzymano odpowiedzi na komendę: {full_command}")
             self.log_to_file(f"Nie otrzymano odpowiedzi na komendę: {full_command}. Odpowiedź: Brak", is_error=True)
             return None
@@ -333,14 +438,32 @@ class Interface:
     def send_write_and_update(self, command, value):
         response = self.send_write_command(command, value)
         self.log_output(f"Wysłano: {command}_{value}")
-        if "done ok" in response:
+        if response and "done ok" in response:
             self.update_table(command, value)
         else: self.update_table(command, "Błąd")
         self.log_output(f"Otrzymano: {response}")
 
 
 
-    def send_and_update(self, command):
+    def run_in_background(self, func, *args):
+        # Wynik trafia do tabeli i konsoli przez UiDispatcher (update_table, log_output)
+        future = self.worker.submit(func, *args)
+        future.add_done_callback(self.report_background_error)
+        return future
+
+    def report_background_error(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            self.log_output(f"Błąd: {future.exception()}")
+
+    def poll_command(self, command):
+        # Autoupdate: rejestry z ważnym wpisem w pamięci podręcznej nie zajmują łącza
+        self.send_and_update(command, use_cache=True)
+
+    def send_and_update(self, command, use_cache=False):
+        cached = self.read_cache.get(command) if use_cache else None
+        if cached is not None:
+            self.update_table(command, self.extract_value(cached))
+            return
         response = self.send_command(command)
         self.log_output(f"Wysłano: {command}")
         value = self.extract_value(response) if response else "Brak odpowiedzi"
@@ -348,66 +471,131 @@ class Interface:
         self.update_table(command, value)
 
     def send_all_commands(self):
-        for command in self.read_commands:
-            self.send_and_update(command)
+        # Odczyt całej tabeli w tle, aby nie blokować okna
+        if self.batch_running:
+            return
+        self.batch_running = True
+        threading.Thread(target=self.send_all_commands_batch, daemon=True).start()
+
+    def send_all_commands_batch(self):
+        try:
+            responses = self.send_commands_batch(self.read_commands)
+            updates = []
+            for command in self.read_commands:
+                response = responses.get(command)
+                value = self.extract_value(response) if response else "Brak odpowiedzi"
+                self.log_output(f"Otrzymano: {response}")
+                updates.append((command, value))
+            self.update_table_rows(updates)
+        finally:
+            self.batch_running = False
+
+    def send_commands_batch(self, commands):
+        if not self.serial_handler.is_connected():
+            self.log_output("Błąd: Brak połączenia z portem szeregowym.")
+            self.log_to_file("Błąd: Brak połączenia z portem szeregowym.", is_error=True)
+            return {}
+
+        cached = {}
+        for command in commands:
+            response = self.read_cache.get(command)
+            if response is not None:
+                cached[command] = response
+        to_send = [command for command in commands if command not in cached]
+
+        try:
+            # Kilka komend w locie naraz (podczas sterowania z okna głównego mniej) - dopasowanie po nazwie komendy
+            responses = self.connection.send_batch(to_send, max_in_flight=self.batch_in_flight)
+        except Exception as e:
+            self.log_output(f"Błąd wysyłania: {e}")
+            self.log_to_file(f"Błąd wysyłania: {e}", is_error=True)
+            return {}
+
+        in_flight = min(self.batch_in_flight, self.connection.limit(PRIORITY_DIAGNOSTIC))
+        self.log_output(f"Wysłano: {len(to_send)} komend (w locie: {in_flight}, z pamięci: {len(cached)})")
+        for command in to_send:
+            response = responses.get(command)
+            self.log_to_file(f"Wysłano komendę: {command}")
+            if not response:
+                self.log_output(f"Nie otrzymano odpowiedzi na komendę: {command}")
+                self.log_to_file(f"Nie otrzymano odpowiedzi na komendę: {command}. Odpowiedź: Brak", is_error=True)
+                continue
+            self.log_to_file(f"Odebrano wiadomość: {response}")
+            if not (command.split('_')[0] in response and command in response):
+                self.log_output(f"Nieprawidłowa odpowiedź: {response}")
+                self.serial_handler.diagnostics.record_invalid(command)
+                self.log_to_file(f"Nieprawidłowa odpowiedź dla komendy {command}: {response}", is_error=True)
+            else:
+                self.read_cache.put(command, response)
+        responses.update(cached)
+        return responses
 
     def update_table(self, command, value):
+        self.update_table_rows([(command, value)])
+
+    def update_table_rows(self, updates):
+        # Zmiany wierszy zbierane są w słowniku i nanoszone na tabelę jednym przebiegiem w wątku Tk
+        with self.table_lock:
+            for command, value in updates:
+                self.pending_rows[command] = self.table_row_values(command, value)
+        self.ui.post("table", self.flush_table_rows)
+
+    def table_row_values(self, command, value):
         try:
             if command == "encoder_1" or command == "encoder_2":
                 value = float(200/1000)*int(value)
             value_avg = float(value) if value else 0  # Konwersja wartości na float
             self.command_data[command].append(value_avg)
-            self.command_data[command] = self.command_data[command][-10:]
-
-            # Obliczenie średnich
-            avg_5 = sum(self.command_data[command][-5:]) / len(self.command_data[command][-5:]) if len(
-                self.command_data[command]) >= 5 else ""
-            avg_10 = sum(self.command_data[command]) / len(self.command_data[command]) if len(
-                self.command_data[command]) >= 10 else ""
-        except ValueError:
-            avg_5= ""
-            avg_10= ""
-
-        # Aktualizacja danych w tabeli
-        for child in self.tree.get_children():
-            item = self.tree.item(child)
-            if item["values"][1] == command:
-                self.tree.item(
-                    child,
-                    values=(
-                        item["values"][0],  # lp
-                        command,  # nazwa_typ
-                        value,  # wartosc
-                        f"{avg_5:.2f}" if avg_5 else "",  # srednia_5
-                        f"{avg_10:.2f}" if avg_10 else "",  # srednia_10
-                    ),
-                )
-                return
+
+            # Filtry wybrane dla kolumn; puste pole do zapełnienia okna filtra
+            filtered = []
+            for command_filter in self.table_filters[command]:
+                result = command_filter.update(value_avg)
+                filtered.append(result if command_filter.ready else "")
+        except (ValueError, KeyError):
+            filtered = ["", ""]
+        return (value, *filtered)
+
+    def flush_table_rows(self):
+        with self.table_lock:
+            rows, self.pending_rows = self.pending_rows, {}
+        self.set_table_rows(rows)
+
+    def set_table_rows(self, rows):
+        for command, (value, filtered_1, filtered_2) in rows.items():
+            row = self.tree_rows.get(command)  # (id wiersza, lp) - bez przeszukiwania tabeli
+            if row is None:
+                continue
+            self.tree.item(
+                row[0],
+                values=(
+                    row[1],  # lp
+                    command,  # nazwa_typ
+                    value,  # wartosc
+                    f"{filtered_1:.2f}" if filtered_1 != "" else "",  # filtr_1
+                    f"{filtered_2:.2f}" if filtered_2 != "" else "",  # filtr_2
+                ),
+            )
 
     def extract_value(self, response):
-        try:
-            if "val=" in response:
-                return response.split("val=")[1].split()[0]
-        except IndexError:
+        reply = parse_reply(response)
+        if reply.status == STATUS_VALUE:
+            return reply.value
+        if "val=" in response:
             return "Błąd parsowania"
         return "Brak wartości"
 
     def log_output(self, message):
-        self.console_output.config(state="normal")
-        self.console_output.insert(tk.END, message + "\n")
-        self.console_output.config(state="disabled")
-        self.console_output.see(tk.END)
+        # Może być wywołane z dowolnego wątku - wpis trafia do konsoli w najbliższej klatce
+        self.console.append(message)
 
     def on_enter_command(self, event):
         command = self.console_entry.get()
         if command.strip():
             self.console_entry.delete(0, tk.END)
-            self.send_and_update(command)
+            self.run_in_background(self.send_and_update, command)
 
     def log_to_file(self, message, is_error=False):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
         if is_error:
-            with open(self.error_file, 'a') as err_log:
-                err_log.write(f"[{timestamp}] {message}\n")
-        with open(self.log_file, 'a') as log:
-            log.write(f"[{timestamp}] {message}\n")
\ No newline at end of file
+            self.error_writer.write(message)
+        self.log_writer.write(message)
\ No newline at end of file
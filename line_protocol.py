@@ -0,0 +1,110 @@
+import re
+from collections import namedtuple
+
+# Statusy odpowiedzi urządzenia
+STATUS_VALUE = "val"  # Odczyt: "hx_read val=8012"
+STATUS_DONE = "done ok"  # Zapis: "pot_1_100 done ok"
+STATUS_ERROR = "error"  # Nieznana komenda lub błąd zapisu: "... error"
+STATUS_UNKNOWN = ""
+
+_READ_RE = re.compile(r"(\S+)\s+val=(\S+)")  # Typowa odpowiedź na odczyt - jedno dopasowanie
+_VALUE_RE = re.compile(r"val=(\S+)")
+_WRITE_RE = re.compile(r"(\S+?)_(-?\d+)\s+done\s+ok\b")
+_ERROR_RE = re.compile(r"\berror\b", re.IGNORECASE)
+
+
+class LineFramer:
+    """Dzieli strumień bajtów na linie zakończone \\n.
+
+    Bajty trafiają do jednego, wielokrotnie używanego bufora (bytearray); szukanie końca linii zaczyna się
+    od miejsca, w którym skończyło się poprzednie, a przetworzone linie usuwane są jednym `del` na wywołanie.
+    Niepełna linia czeka na dalsze bajty. Linia dłuższa niż `max_line` (np. śmieci po zakłóceniach)
+    jest odrzucana, aby bufor nie rósł bez końca.
+    """
+
+    def __init__(self, max_line=4096, encoding='utf-8'):
+        self.max_line = max_line
+        self.encoding = encoding
+        self.overflows = 0  # Liczba odrzuconych zbyt długich linii
+        self._buffer = bytearray()
+        self._scanned = 0  # Część bufora bez \n - nie jest przeszukiwana ponownie
+        self._discarding = False  # Pomijanie reszty zbyt długiej linii do najbliższego \n
+
+    def feed(self, data):
+        """Dodaje bajty i zwraca listę kompletnych, niepustych linii (bez białych znaków na końcach)."""
+        buffer = self._buffer
+        buffer += data
+        lines = []
+        start = 0
+        end = buffer.find(b"\n", self._scanned)
+        while end >= 0:
+            if self._discarding:
+                self._discarding = False
+            else:
+                line = buffer[start:end].decode(self.encoding, errors='replace').strip()
+                if line:
+                    lines.append(line)
+            start = end + 1
+            end = buffer.find(b"\n", start)
+        if start:
+            del buffer[:start]
+        if len(buffer) > self.max_line:
+            if not self._discarding:
+                self.overflows += 1
+            buffer.clear()
+            self._discarding = True
+        self._scanned = len(buffer)
+        return lines
+
+    def pending(self):
+        """Liczba bajtów niepełnej linii czekających w buforze."""
+        return len(self._buffer)
+
+    def clear(self):
+        self._buffer.clear()
+        self._scanned = 0
+        self._discarding = False
+
+
+class Reply(namedtuple("Reply", "command value status line")):
+    """Rozpoznana odpowiedź urządzenia.
+
+    command - nazwa rejestru ("hx_read", "pot_1"), value - wartość jako tekst lub None,
+    status - STATUS_VALUE / STATUS_DONE / STATUS_ERROR / STATUS_UNKNOWN, line - cała linia.
+    """
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.status in (STATUS_VALUE, STATUS_DONE)
+
+    @property
+    def number(self):
+        """Wartość jako int lub float; None, jeśli nie jest liczbą."""
+        if self.value is None:
+            return None
+        try:
+            return int(self.value)
+        except ValueError:
+            try:
+                return float(self.value)
+            except ValueError:
+                return None
+
+
+def parse_reply(line):
+    """Zamienia linię odpowiedzi na Reply (wyrażenia regularne kompilowane raz, przy imporcie modułu)."""
+    match = _READ_RE.match(line)
+    if match is not None:
+        return Reply(match.group(1), match.group(2), STATUS_VALUE, line)
+    match = _VALUE_RE.search(line)
+    if match is not None:
+        return Reply(line.split(None, 1)[0], match.group(1), STATUS_VALUE, line)
+    match = _WRITE_RE.match(line)
+    if match is not None:
+        return Reply(match.group(1), match.group(2), STATUS_DONE, line)
+    parts = line.split(None, 1)
+    command = parts[0] if parts else ""
+    status = STATUS_ERROR if _ERROR_RE.search(line) else STATUS_UNKNOWN
+    return Reply(command, None, status, line)
@@ -0,0 +1,109 @@
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+class AsyncLogWriter:
+    """Zapis logu do pliku w tle.
+
+    write() tylko dopisuje wpis do bufora w pamięci. Wątek zapisujący co `flush_interval` sekund
+    (lub po zebraniu `batch_size` wpisów) zapisuje je jedną operacją do otwartego pliku
+    i zmienia plik na nowy po przekroczeniu `max_bytes` (poprzednie: log.txt.1, log.txt.2, ...).
+    """
+
+    def __init__(self, path, header=None, max_bytes=5 * 1024 * 1024, backup_count=5,
+                 flush_interval=0.5, batch_size=500):
+        self.path = path
+        self.header = header  # Pierwsza linia każdego nowego pliku
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._records = deque()
+        self._wakeup = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"log-writer-{os.path.basename(path)}", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, message):
+        """Dodaje wpis do bufora (znacznik czasu nadawany w chwili wywołania)."""
+        self._records.append((time.time(), message))
+        if len(self._records) >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """Zapisuje wszystkie zbuforowane wpisy na dysk."""
+        with self._flush_lock:
+            records = []
+            while self._records:
+                records.append(self._records.popleft())
+            if not records:
+                return
+            lines = []
+            for timestamp, message in records:
+                stamp = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+                lines.append(f"[{stamp}] {message}\n")
+            data = "".join(lines).encode('utf-8')
+
+            if self._file is None:
+                self._open()
+            elif self._size + len(data) > self.max_bytes:
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+            self._size += len(data)
+
+    def close(self):
+        """Zapisuje zaległe wpisy i zamyka plik (wywoływane też przy zamykaniu aplikacji)."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout=2)
+        self.flush()
+        with self._flush_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        atexit.unregister(self.close)
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Błąd zapisu logu {self.path}: {e}")
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'ab')
+        self._size = self._file.tell()
+        if self._size == 0 and self.header:
+            header = f"{self.header}\n".encode('utf-8')
+            self._file.write(header)
+            self._size = len(header)
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
@@ -1,8 +1,30 @@
+import time
+
+start_time = time.perf_counter()  # Pomiar czasu startu liczony przed importem modułów aplikacji
+
+import argparse
 from tkinter import Tk
-from main_interface import MainApp
+from main_interface import MainApp, MultiWinderApp
+
+# Budżet czasu od uruchomienia do pierwszego wyświetlenia okna [s]
+STARTUP_BUDGET = 0.5
+
+
+def report_startup(app):
+    elapsed = time.perf_counter() - start_time
+    if elapsed > STARTUP_BUDGET:
+        app.log_output(f"Uwaga: start aplikacji trwał {elapsed:.3f} s (budżet {STARTUP_BUDGET:.1f} s)")
+    else:
+        app.log_output(f"Start aplikacji: {elapsed:.3f} s")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sterowanie nawijarką światłowodu.")
+    parser.add_argument("--winders", type=int, default=1, help="liczba nawijarek (zakładek) w oknie")
+    args = parser.parse_args()
+
     root = Tk()
-    app = MainApp(root)
-    root.mainloop()
\ No newline at end of file
+    app = MainApp(root) if args.winders <= 1 else MultiWinderApp(root, args.winders)
+    # Wywołane po pierwszym narysowaniu okna przez pętlę zdarzeń
+    root.after_idle(lambda: root.after(0, report_startup, app))
+    root.mainloop()
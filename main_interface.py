@@ -1,18 +1,54 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import os
 import threading
 import time
-from interface import Interface
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from tkdial import Dial
 from serial_communication import SerialHandler
+from ring_buffer import RingSeries
+from ui_dispatcher import UiDispatcher
+from console_widget import ConsoleView
+from tension_plot import TensionPlot
+from port_watcher import PortWatcher
+from register_cache import WriteCoalescer
+from signal_filters import FILTER_PRESETS, create_filter
+from shared_connection import SharedConnection, PRIORITY_CONTROL
+from line_protocol import parse_reply, STATUS_VALUE
 
 
 class MainApp:
-    def __init__(self, root):
+    def __init__(self, root, container=None, device_manager=None, name=None):
         self.root = root
-        self.root.title("Nawijarka Światłowodów")
-        self.serial_handler = SerialHandler()
+        # Sekcje rysowane są w `container` (np. zakładka okna wielu nawijarek), domyślnie w oknie głównym
+        self.container = container if container is not None else root
+        self.device_manager = device_manager
+        self.name = name
+        if device_manager is not None:
+            self.serial_handler = device_manager.get(name)
+        else:
+            self.root.title("Nawijarka Światłowodów")
+            self.serial_handler = SerialHandler()
+        # Przedrostek plików nagrań i raportów, aby nawijarki nie nadpisywały swoich plików
+        self.file_prefix = f"{name.replace(' ', '_')}_" if name else ""
+        # Aktualizacje widżetów z wątków roboczych trafiają do wątku Tk przez kolejkę
+        self.ui = UiDispatcher(self.root)
+        # Automatyczne wznawianie połączenia po zerwaniu łącza (np. chwilowe odłączenie USB)
+        # Przy wielu nawijarkach ponowne połączenie przez DeviceManager - port mogła w tym czasie zająć inna
+        reconnect = (lambda port: device_manager.connect(name, port)) if device_manager is not None else None
+        self.port_watcher = PortWatcher(self.serial_handler, on_lost=self.on_link_lost,
+                                        on_restored=self.on_link_restored, connect=reconnect)
+        self.reconnecting = False
+        # Wspólna kolejka komend z priorytetami - z tego samego połączenia korzysta okno Debug
+        self.connection = SharedConnection(self.serial_handler)
+        # Kopia rejestrów urządzenia i kolejka zapisów z elementów sterujących (bez powtórzeń, tylko najnowsze)
+        self.register_shadow = self.connection.register_shadow
+        self.write_queue = WriteCoalescer(self.send_write_command, self.register_shadow)
+        # Operacje czekające na odpowiedź urządzenia (przyciski, inicjalizacja po połączeniu) - poza wątkiem Tk;
+        # przy wielu nawijarkach wątek roboczy danej nawijarki z DeviceManager
+        self.worker = None if device_manager is not None else ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="main-worker")
         #self.title("Nawijarka Światłowodu")
 
         self.sm1_switch_var = tk.IntVar(value=0)
@@ -21,21 +57,38 @@ class MainApp:
         self.sm2_switch_var = tk.IntVar(value=0)
         self.sm2_check_var = tk.IntVar(value=0)
 
-        self.hxdata = []
-        self.hx_output_type=0
-        self.hx_switch_var = tk.IntVar(value=0)
+        self.hxdata = RingSeries(100)  # Historia surowych odczytów - do zainicjowania nowo wybranego filtra
+        self.hx_filter = create_filter("raw")
 
-        self.lendata = []
+        self.lendata = RingSeries(100)
+        self.recorder = None  # Zapis przebiegu naciągu i długości (TelemetryRecorder)
 
 
         self.autoupdate_delay = 0.2
+        self.stream_rate = 50  # Częstotliwość strumienia hx/enkodera wysyłanego przez urządzenie [Hz]
+        self.stream_commands = []
+        # Próbki strumienia przetwarzane poza wątkiem odczytu portu (filtr, wykres, zapis, publikacja) - po kolei
+        self.stream_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream-samples")
+        # Kopie stanu checkboxów autoodczytu dla wątków odczytu (zmienne Tk czytane są tylko w wątku Tk)
+        self.autoupdate_flags = {}
+        # Regulacja naciągu: pętla PID w osobnym wątku zapisuje pot_1/pot_2 na podstawie hx_read
+        self.tension_loop = None
+        self.control_period = 0.02  # Okres pętli regulacji [s]
+        self.control_rate_limit = 200.0  # Maksymalna zmiana prędkości silnika [jednostki pot/s]
+        self._fresh_samples = {}  # Komenda -> numer ostatniej próbki strumienia odczytanej przez read_fresh_value
+        # Receptury nawijania wykonywane w osobnym wątku wg terminów bezwzględnych
+        self.recipe = None
+        # Udostępnianie próbek i zapisów innym programom lokalnym przez TCP (bez dodatkowych transakcji)
+        self.telemetry_server = None
+        self.telemetry_port = 8765
+        self.recipe_executor = None  # RecipeExecutor tworzony przy pierwszym starcie receptury
         # Indeks aktualnej kolumny
         self.current_column = 0
-        self.column_number = 6
+        self.column_number = 9
 
         # Konfiguracja siatki dla kolumn
         for col in range(self.column_number):
-            self.root.columnconfigure(col, weight=1)
+            self.container.columnconfigure(col, weight=1)
 
         self.create_ui()
 
@@ -46,10 +99,13 @@ class MainApp:
         self.add_section(self.create_sm2_section)
         self.add_section(self.create_hx_section)
         self.add_section(self.create_len_section)
+        self.add_section(self.create_plot_section)
+        self.add_section(self.create_control_section)
+        self.add_section(self.create_recipe_section)
 
 
     def add_section(self, section_function):
-        frame = ttk.Frame(self.root, padding="5")
+        frame = ttk.Frame(self.container, padding="5")
         frame.grid(column=self.current_column, row=0, sticky="nsew", padx=10, pady=10)
         section_function(parent=frame)
         self.current_column = (self.current_column + 1) % self.column_number
@@ -66,6 +122,28 @@ class MainApp:
 
         # Dodanie przycisku Debug
         ttk.Button(parent, text="Debug", command=lambda: self.open_interface_window(self.root)).pack(pady=5)
+        self.share_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(parent, text="Udostępnij dane (TCP)", variable=self.share_var,
+                        command=self.toggle_telemetry_server).pack(pady=5)
+
+    def toggle_telemetry_server(self):
+        if self.share_var.get():
+            from telemetry_server import TelemetryServer  # Moduły funkcji dodatkowych ładowane przy pierwszym użyciu
+            server = TelemetryServer(("127.0.0.1", self.telemetry_port), write_func=self.send_write_command,
+                                     read_func=self.send_command)
+            try:
+                address = server.start()
+            except OSError as e:
+                self.log_output(f"Błąd serwera telemetrii: {e}")
+                self.share_var.set(False)
+                return
+            self.telemetry_server = server
+            self.log_output(f"Serwer telemetrii: {address[0]}:{address[1]}")
+        elif self.telemetry_server is not None:
+            server, self.telemetry_server = self.telemetry_server, None
+            stats = server.stats()
+            server.stop()
+            self.log_output(f"Zatrzymano serwer telemetrii ({stats['frames']} ramek, {stats['samples']} próbek)")
 
     def open_interface_window(self, parent):
         new_window = tk.Toplevel(parent)
@@ -74,7 +152,8 @@ class MainApp:
 
         # Dodaj zawartość interfejsu Debug
         #ttk.Label(new_window, text="Debug Interface").pack(pady=10)
-        Interface(new_window)
+        from interface import Interface  # Import dopiero przy otwarciu okna - krótszy start aplikacji
+        Interface(new_window, connection=self.connection)  # Debug korzysta z portu okna głównego
 
     def create_console_section(self, parent):
         self.console_frame = ttk.Frame(parent)
@@ -91,8 +170,8 @@ class MainApp:
         self.console_visible = False  # Flaga widoczności konsoli
 
         ttk.Label(self.console_inner_frame, text="Konsola").pack(anchor="w", pady=5)
-        self.console_output = tk.Text(self.console_inner_frame, height=15, state="disabled")
-        self.console_output.pack(fill=tk.BOTH, expand=True, pady=5)
+        self.console = ConsoleView(self.console_inner_frame, height=15)
+        self.console.pack(fill=tk.BOTH, expand=True, pady=5)
 
     def toggle_console(self):
         if self.console_visible:
@@ -106,35 +185,82 @@ class MainApp:
         self.console_visible = not self.console_visible
 
     def refresh_ports(self):
-        ports = self.serial_handler.get_available_ports()  # Implementacja w SerialHandler
+        # Wyszukiwanie portów (wolne przy wielu urządzeniach USB) w tle - lista uzupełniana po zakończeniu
+        threading.Thread(target=self.find_ports, daemon=True).start()
+
+    def find_ports(self):
+        try:
+            ports = self.serial_handler.get_available_ports()  # Implementacja w SerialHandler
+        except Exception as e:
+            self.log_output(f"Błąd wyszukiwania portów: {e}")
+            return
+        self.ui.post("ports", self.set_ports, ports)
+
+    def set_ports(self, ports):
         self.port_dropdown['values'] = ports
 
     def toggle_connection(self):
-        if self.serial_handler.is_connected():
+        if self.serial_handler.is_connected() or self.reconnecting:
+            self.port_watcher.stop()
+            self.reconnecting = False
             self.serial_handler.disconnect()
             self.connect_button.config(text="Połącz")
         else:
             port = self.port_var.get()
             try:
-                self.serial_handler.connect(port)
+                if self.device_manager is not None:
+                    self.device_manager.connect(self.name, port)  # Ten sam port nie może obsługiwać dwóch nawijarek
+                else:
+                    self.serial_handler.connect(port)
                 self.connect_button.config(text="Rozłącz")
                 self.log_output(f"Połączono z {port}.")
-                self.init_after_connection()
+                self.run_in_background(self.init_after_connection)
+                self.port_watcher.start(port)
             except Exception as e:
                 self.log_output(f"Błąd połączenia: {e}")
 
+    def on_link_lost(self, port):
+        # Wywoływane w wątku PortWatcher
+        self.reconnecting = True
+        self.log_output(f"Błąd: utracono połączenie z {port} - ponawianie połączenia...")
+        self.ui.post("connect_button", self.connect_button.config, {"text": "Łączenie..."})
+        if self.recipe_executor is not None and self.recipe_executor.is_running():
+            # Bez łącza nie da się dotrzymać planu ani odczytać długości - receptura jest przerywana
+            self.recipe_executor.stop()
+
+    def on_link_restored(self, port, outage):
+        self.reconnecting = False
+        self.log_output(f"Przywrócono połączenie z {port} po {outage:.1f} s.")
+        self.ui.post("connect_button", self.connect_button.config, {"text": "Rozłącz"})
+        self.init_after_connection()
+
     def init_after_connection(self):
+        self.connection.invalidate_caches()  # Stan urządzenia po (ponownym) połączeniu jest nieznany
         self.send_write_command(f"pot_wp", 1)
+        if self.stream_commands:
+            # Po ponownym połączeniu urządzenie mogło zapomnieć o strumieniu
+            self.send_write_command("stream", self.stream_rate)
+
+    def run_in_background(self, func, *args):
+        # Wynik trafia do okna przez UiDispatcher i konsolę - wątek Tk nie czeka na urządzenie
+        if self.device_manager is not None:
+            future = self.device_manager.submit(self.name, lambda handler: func(*args))
+        else:
+            future = self.worker.submit(func, *args)
+        future.add_done_callback(self.report_background_error)
+        return future
+
+    def report_background_error(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            self.log_output(f"Błąd: {future.exception()}")
 
     def log_output(self, message):
-        if not hasattr(self, 'console_output') or self.console_output is None:
+        if not hasattr(self, 'console') or self.console is None:
             print(f"Brak konsoli: {message}")  # Jeśli konsola nie istnieje, wyświetlamy w terminalu
             return
 
-        self.console_output.config(state="normal")
-        self.console_output.insert(tk.END, message + "\n")
-        self.console_output.config(state="disabled")
-        self.console_output.see(tk.END)
+        # Może być wywołane z dowolnego wątku - wpis trafia do konsoli w najbliższej klatce
+        self.console.append(message)
 
     def create_sm1_section(self, parent):
         # Stworzenie sekcji sterowania silnikiem 1
@@ -197,7 +323,7 @@ class MainApp:
 
     def on_dial_stop(self, value, pot):
         # Wysłanie wiadomości po zatrzymaniu pokrętła
-        self.send_write_command(f"pot_{pot}", value)
+        self.queue_write(f"pot_{pot}", value)
 
     def create_radiobutton(self, parent, text, value, var, sm):
         switch = ttk.Radiobutton(
@@ -222,19 +348,39 @@ class MainApp:
 
     def update_check_status(self, var, sm):
         value = var.get()
-        self.send_write_command(f"sm{sm}_sd", value)
+        self.queue_write(f"sm{sm}_sd", value)
 
     def update_radio_status(self, var, sm):
         selected_value = var.get()
         if selected_value == 1:
-            self.send_write_command(f"sm{sm}_ccw", 0)
-            self.send_write_command(f"sm{sm}_cw", 1)
+            self.queue_write(f"sm{sm}_ccw", 0)
+            self.queue_write(f"sm{sm}_cw", 1)
         elif selected_value == 2:
-            self.send_write_command(f"sm{sm}_cw", 0)
-            self.send_write_command(f"sm{sm}_ccw", 1)
+            self.queue_write(f"sm{sm}_cw", 0)
+            self.queue_write(f"sm{sm}_ccw", 1)
         elif selected_value == 3:
-            self.send_write_command(f"sm{sm}_ccw", 0)
-            self.send_write_command(f"sm{sm}_cw", 0)
+            self.queue_write(f"sm{sm}_ccw", 0)
+            self.queue_write(f"sm{sm}_cw", 0)
+
+    def queue_write(self, command, value):
+        # Zapis w tle: pomijany, jeśli urządzenie ma już tę wartość; seria zapisów jednego rejestru -> ostatni
+        if not self.serial_handler.is_connected():
+            self.log_output("Błąd: Brak połączenia z portem szeregowym.")
+            return
+        self.write_queue.submit(command, value)
+
+    def send_action(self, command, value):
+        # Komenda akcji (np. zerowanie enkodera) z pominięciem kolejki zapisów - zawsze wysyłana, z potwierdzeniem
+        response = self.send_write_command(command, value)
+        if command == "encoder_1":
+            self._fresh_samples[command] = self.lendata.total_count  # Próbki strumienia sprzed zerowania są nieaktualne
+            if response and "done ok" in response:
+                self.plot.reset_length()  # Jawne zerowanie - nowy przebieg wykresu naciąg/długość
+        return response
+
+    def reset_length(self):
+        response = self.send_action("encoder_1", 0)
+        self.log_output(f"Zerowanie długości: {response or 'Brak odpowiedzi'}")
 
     def create_dial(self, parent, sm):
         ttk.Label(parent, text=f"Prędkość SM{sm}").pack()
@@ -255,65 +401,52 @@ class MainApp:
             command=lambda: self.start_queue_automatic_update(var1=self.check_vars_hx ,command1="hx_read", delay=self.autoupdate_delay, window_var1=self.number_var_hx, command2="encoder_1", window_var2=self.number_var_len)
         ).pack(side=tk.LEFT, padx=5)
 
-        ttk.Radiobutton(
-            parent,
-            text="RAW",
-            variable=self.hx_switch_var,
-            value=1,
-            command=lambda: self.update_hx_output_type(self.hx_switch_var)
-        ).pack()
-
-        ttk.Radiobutton(
-            parent,
-            text="5AVG",
-            variable=self.hx_switch_var,
-            value=2,
-            command=lambda: self.update_hx_output_type(self.hx_switch_var)
-        ).pack()
+        # Filtr wartości wyświetlanej: lista gotowych lub własny opis, np. "ma:25", "ema:0.05"
+        ttk.Label(parent, text="Filtr").pack()
+        self.hx_filter_var = tk.StringVar(value=self.hx_filter.spec)
+        filter_box = ttk.Combobox(parent, textvariable=self.hx_filter_var, values=FILTER_PRESETS, width=12)
+        filter_box.pack()
+        filter_box.bind("<<ComboboxSelected>>", lambda event: self.update_hx_filter())
+        filter_box.bind("<Return>", lambda event: self.update_hx_filter())
 
-        ttk.Radiobutton(
-            parent,
-            text="10AVG",
-            variable=self.hx_switch_var,
-            value=3,
-            command=lambda: self.update_hx_output_type(self.hx_switch_var)
-        ).pack()
-
-    def update_hx_output_type(self, var):
-        selected_value = var.get()
-        if selected_value == 1:
-            self.hx_output_type=0
-        elif selected_value == 2:
-            self.hx_output_type=1
-        elif selected_value == 3:
-            self.hx_output_type=2
+    def update_hx_filter(self):
+        try:
+            hx_filter = create_filter(self.hx_filter_var.get())
+        except ValueError as e:
+            self.log_output(f"Błąd: {e}")
+            self.hx_filter_var.set(self.hx_filter.spec)
+            return
+        hx_filter.prime(self.hxdata.values())  # Nowy filtr startuje z historią, bez pustego okna
+        self.hx_filter = hx_filter
+        self.log_output(f"Filtr naciągu: {hx_filter.label}")
 
 
     def update_number_window(self, value, number_var):
         try:
             value_avg = float(value) if value else 0  # Konwersja wartości na float
         except ValueError:
-            value_avg = self.hxdata[-1] if self.hxdata else 0  # Pobranie ostatniego elementu zamiast listy
-
-        self.hxdata.append(value_avg)
-        self.hxdata = self.hxdata[-10:]  # Ograniczenie historii do 10 wartości
-
-        output_type = self.hx_output_type
-        value = ""
-
-        try:
-            if output_type == 1 and len(self.hxdata) >= 5:
-                avg_5 = sum(self.hxdata[-5:]) / len(self.hxdata[-5:])
-                value = f"{avg_5:.2f}"
-            elif output_type == 2 and len(self.hxdata) >= 10:
-                avg_10 = sum(self.hxdata) / len(self.hxdata)
-                value = f"{avg_10:.2f}"
-        except TypeError:
-            print(f"Błąd: hxdata={self.hxdata}")  # Debugowanie wartości listy
-        number_var.set(value)
+            value_avg = self.hxdata.last(0)  # Pobranie ostatniego elementu
+
+        self.hxdata.append(value_avg)  # Bufor cykliczny przechowuje tylko 100 ostatnich wartości
+        server = self.telemetry_server
+        if server is not None:
+            server.publish("hx_read", value_avg)
+        length = self.lendata.last() * self.len_translate if len(self.lendata) else None
+        self.plot.add_sample(value_avg, length)
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.append(value_avg, length)
+
+        hx_filter = self.hx_filter
+        filtered = hx_filter.update(value_avg)
+        # Do zapełnienia okna filtra pole pozostaje puste
+        self.ui.set_var(number_var, f"{filtered:.2f}" if hx_filter.ready else "")
 
     def stop_automatic_update(self, var):
         var.set(False)  # Resetuje stan checkboxa
+        running = self.autoupdate_flags.pop(str(var), None)
+        if running is not None:
+            running.clear()
 
     def create_number_window(self, parent, text, number_var):
         ttk.Label(parent, text=text).pack()
@@ -327,12 +460,215 @@ class MainApp:
         self.create_number_window(parent, "Wartość [mm]", number_var=self.number_var_len)
         delay = 0.2
         self.check_vars_len = tk.BooleanVar(value=False)
-        self.cmd = "encoder_1_0"
-        ttk.Button(parent, text="Zeruj wartość", command=lambda: self.send_and_update(self.cmd)).pack(fill="x", pady=5)
+        ttk.Button(parent, text="Zeruj wartość",
+                   command=lambda: self.run_in_background(self.reset_length)).pack(fill="x", pady=5)
+        self.record_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(parent, text="Zapis przebiegu", variable=self.record_var,
+                        command=self.toggle_recording).pack(pady=5)
+
+    def toggle_recording(self):
+        if self.record_var.get():
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            path = f"recordings/{self.file_prefix}telemetry_{timestamp}.nwt"
+            from telemetry_recorder import TelemetryRecorder
+            self.recorder = TelemetryRecorder(path)
+            self.log_output(f"Zapis przebiegu do pliku {path}")
+        elif self.recorder is not None:
+            recorder, self.recorder = self.recorder, None
+            recorder.close()
+            self.log_output(f"Zakończono zapis przebiegu: {recorder.path}")
+
+    def create_plot_section(self, parent):
+        # Wykresy rysowane z danych zredukowanych do min/max na piksel - koszt nie rośnie z długością sesji
+        self.plot = TensionPlot(parent)
+        self.plot.pack(fill=tk.BOTH, expand=True)
+
+    def create_control_section(self, parent):
+        ttk.Label(parent, text="Regulacja naciągu").pack()
+        self.control_setpoint_var = tk.DoubleVar(value=8000.0)
+        self.control_kp_var = tk.DoubleVar(value=0.01)
+        self.control_ki_var = tk.DoubleVar(value=0.1)
+        self.control_kd_var = tk.DoubleVar(value=0.0)
+        self.control_pot_var = tk.IntVar(value=1)
+        self.control_var = tk.BooleanVar(value=False)
+        for text, var in (("Naciąg zadany", self.control_setpoint_var), ("Kp", self.control_kp_var),
+                          ("Ki", self.control_ki_var), ("Kd", self.control_kd_var)):
+            ttk.Label(parent, text=text).pack()
+            ttk.Entry(parent, textvariable=var, width=10).pack(fill="x")
+        # SM1 (nawijanie) zwiększa naciąg, SM2 (podawanie) go zmniejsza
+        ttk.Radiobutton(parent, text="SM1", variable=self.control_pot_var, value=1).pack()
+        ttk.Radiobutton(parent, text="SM2", variable=self.control_pot_var, value=2).pack()
+        ttk.Checkbutton(parent, text="Regulacja", variable=self.control_var,
+                        command=self.toggle_tension_control).pack(pady=5)
+        self.control_stats_label = ttk.Label(parent, text="", justify=tk.LEFT)
+        self.control_stats_label.pack()
+
+    def toggle_tension_control(self):
+        if not self.control_var.get():
+            self.stop_tension_control()
+            return
+        if not self.serial_handler.is_connected():
+            self.log_output("Błąd: Brak połączenia z portem szeregowym.")
+            self.control_var.set(False)
+            return
+        from tension_controller import PIDController, TensionControlLoop
+        try:
+            pot = self.control_pot_var.get()
+            controller = PIDController(
+                kp=self.control_kp_var.get(), ki=self.control_ki_var.get(), kd=self.control_kd_var.get(),
+                setpoint=self.control_setpoint_var.get(), rate_limit=self.control_rate_limit,
+                direction=1 if pot == 1 else -1)
+        except (tk.TclError, ValueError):
+            self.log_output("Błąd: Nieprawidłowe nastawy regulatora.")
+            self.control_var.set(False)
+            return
+        # Start od bieżącej prędkości silnika - bez skoku przy przejściu z pracy ręcznej
+        initial = self.register_shadow.get(f"pot_{pot}")
+        self._fresh_samples["hx_read"] = self.hxdata.total_count
+        self.tension_loop = TensionControlLoop(
+            controller, lambda: self.read_fresh_value("hx_read", self.hxdata), lambda value: self.queue_write(f"pot_{pot}", value),
+            period=self.control_period)
+        self.tension_loop.start(float(initial) if initial is not None else None)
+        self.log_output(f"Regulacja naciągu: SM{pot}, zadany {controller.setpoint}, "
+                        f"okres {self.control_period * 1000:.0f} ms")
+        self.refresh_control_stats()
+
+    def stop_tension_control(self):
+        loop, self.tension_loop = self.tension_loop, None
+        if loop is not None:
+            loop.stop()
+            stats = loop.stats()
+            self.log_output(f"Zakończono regulację naciągu: {stats['iterations']} taktów, "
+                            f"jitter p95 {stats['jitter_ms']['p95']} ms, przekroczenia {stats['overruns']}")
+        self.control_var.set(False)
+
+    def read_fresh_value(self, command, series):
+        # Wywoływane z wątków regulatora i receptury; None = brak nowego odczytu
+        if not self.serial_handler.is_connected():
+            return None
+        if command in self.stream_commands:
+            # Strumień dostarcza próbki do bufora - bez dodatkowej transakcji na łączu
+            count = series.total_count
+            if count == self._fresh_samples.get(command):
+                return None
+            self._fresh_samples[command] = count
+            return series.last()
+        # Odczyt dla regulatora i receptury - pierwszeństwo przed odczytami okna Debug
+        response = self.connection.transact(command, priority=PRIORITY_CONTROL)
+        if not response:
+            return None
+        try:
+            return float(self.extract_value(response))
+        except ValueError:
+            return None
+
+    def refresh_control_stats(self):
+        loop = self.tension_loop
+        if loop is None:
+            return
+        if not self.serial_handler.is_connected():
+            self.log_output("Regulacja naciągu przerwana - brak połączenia.")
+            self.stop_tension_control()
+            return
+        stats = loop.stats()
+        self.control_stats_label.config(
+            text=f"Wyjście: {stats['output']}\n"
+                 f"Okres: {stats['interval_ms']['mean']} ms\n"
+                 f"Jitter p95: {stats['jitter_ms']['p95']} ms\n"
+                 f"Opóźnienie p95: {stats['latency_ms']['p95']} ms\n"
+                 f"Przekroczenia: {stats['overruns']}")
+        self.root.after(1000, self.refresh_control_stats)
+
+    def create_recipe_section(self, parent):
+        ttk.Label(parent, text="Receptura").pack()
+        self.recipe_name_var = tk.StringVar(value="Brak")
+        ttk.Label(parent, textvariable=self.recipe_name_var).pack()
+        ttk.Button(parent, text="Wczytaj", command=self.load_recipe).pack(fill="x", pady=2)
+        ttk.Button(parent, text="Start", command=self.start_recipe).pack(fill="x", pady=2)
+        ttk.Button(parent, text="Stop", command=self.stop_recipe).pack(fill="x", pady=2)
+        self.recipe_status_var = tk.StringVar(value="")
+        ttk.Label(parent, textvariable=self.recipe_status_var, justify=tk.LEFT).pack()
+
+    def load_recipe(self):
+        path = filedialog.askopenfilename(title="Wczytaj recepturę", initialdir="recipes",
+                                          filetypes=[("Receptury", "*.json"), ("Wszystkie pliki", "*.*")])
+        if not path:
+            return
+        from recipe_executor import Recipe
+        try:
+            self.recipe = Recipe.from_file(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Receptura", f"Nie można wczytać receptury: {e}")
+            return
+        self.recipe_name_var.set(f"{self.recipe.name} ({len(self.recipe.steps)} kroków)")
+        self.log_output(f"Wczytano recepturę {self.recipe.name} z pliku {path}")
+
+    def start_recipe(self):
+        if self.recipe is None:
+            self.log_output("Błąd: Nie wczytano receptury.")
+            return
+        if not self.serial_handler.is_connected():
+            self.log_output("Błąd: Brak połączenia z portem szeregowym.")
+            return
+        if self.recipe_executor is None:
+            from recipe_executor import RecipeExecutor
+            # Zapisy receptury z potwierdzeniem, z pominięciem kolejki zapisów (bez łączenia wartości rampy)
+            self.recipe_executor = RecipeExecutor(self.send_write_command, self.read_recipe_length,
+                                                  on_step=self.on_recipe_step, on_finish=self.on_recipe_finish,
+                                                  action_func=self.send_action)
+        elif self.recipe_executor.is_running():
+            self.log_output("Receptura jest już wykonywana.")
+            return
+        # Rampy bez "from" zaczynają od bieżących, potwierdzonych przez urządzenie wartości
+        initial = {}
+        for register in ("pot_1", "pot_2"):
+            value = self.register_shadow.get(register)
+            if value is not None:
+                initial[register] = int(value)
+        self.recipe_executor.start(self.recipe, initial)
+        self.log_output(f"Start receptury {self.recipe.name}")
+
+    def stop_recipe(self):
+        if self.recipe_executor is not None and self.recipe_executor.is_running():
+            threading.Thread(target=self.recipe_executor.stop, daemon=True).start()
+
+    def read_recipe_length(self):
+        value = self.read_fresh_value("encoder_1", self.lendata)
+        return value * self.len_translate if value is not None else None
+
+    def on_recipe_step(self, index, step):
+        details = ", ".join(f"{key}={value}" for key, value in step.items() if key != "type")
+        self.ui.set_var(self.recipe_status_var, f"Krok {index + 1}/{len(self.recipe.steps)}: {step['type']}")
+        self.log_output(f"Receptura - krok {index + 1}: {step['type']} ({details})")
+
+    def on_recipe_finish(self, report):
+        path = self.recipe_executor.export_report(
+            report, f"recordings/{self.file_prefix}recipe_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        jitter = report["tick_jitter_ms"]
+        self.ui.set_var(self.recipe_status_var, f"Receptura {report['status']}")
+        self.log_output(f"Receptura {report['recipe']} {report['status']} po {report['elapsed_s']} s; "
+                        f"jitter taktów p95 {jitter['p95']} ms, max {jitter['max']} ms; "
+                        f"raport: {path}")
 
     def start_queue_automatic_update(self, delay, command1,  window_var1, command2, window_var2, var1):
+        # Wywoływane w wątku Tk: stan checkboxa trafia do threading.Event, który sprawdza wątek odczytu
+        previous = self.autoupdate_flags.pop(str(var1), None)
+        if previous is not None:
+            previous.clear()  # Wątek z poprzedniego zaznaczenia kończy pracę
+        if not var1.get():
+            return
+        running = threading.Event()
+        running.set()
+        self.autoupdate_flags[str(var1)] = running
+
         def update():
-            while var1.get():
+            # Nowsze oprogramowanie urządzenia samo wysyła próbki - odpytywanie tylko jako zapas
+            if running.is_set() and self.start_stream(command1, window_var1, command2, window_var2):
+                while running.is_set():
+                    time.sleep(delay)
+                self.stop_stream()
+                return
+            while running.is_set():
                     response1 = self.send_and_update(command1)
                     self.update_number_window(response1, window_var1)
                     time.sleep(delay)
@@ -342,21 +678,56 @@ class MainApp:
         # Uruchamia wątek
         threading.Thread(target=update, daemon=True).start()
 
+    def start_stream(self, command1, window_var1, command2, window_var2):
+        if not self.serial_handler.is_connected():
+            return False
+        self.serial_handler.add_listener(
+            command1, lambda line: self.hand_off_sample(self.update_number_window, line, window_var1))
+        self.serial_handler.add_listener(
+            command2, lambda line: self.hand_off_sample(self.update_len_number_window, line, window_var2))
+        self.stream_commands = [command1, command2]
+        response = self.send_write_command("stream", self.stream_rate)
+        if response and "done ok" in response:
+            self.log_output(f"Strumień {command1}/{command2}: {self.stream_rate} Hz")
+            return True
+        self.remove_stream_listeners()
+        self.log_output("Urządzenie nie obsługuje strumienia - odczyt cykliczny.")
+        return False
+
+    def hand_off_sample(self, update, line, number_var):
+        # Wątek odczytu portu tylko parsuje linię i przekazuje próbkę - nie czeka na dysk, wykres ani klientów TCP
+        future = self.stream_worker.submit(update, self.extract_value(line), number_var)
+        future.add_done_callback(self.report_background_error)
+
+    def stop_stream(self):
+        if self.serial_handler.is_connected():
+            # Słuchacze zostają do potwierdzenia, aby przechwycić próbki wysłane przed zatrzymaniem
+            self.send_write_command("stream", 0)
+        self.remove_stream_listeners()
+
+    def remove_stream_listeners(self):
+        for command in self.stream_commands:
+            self.serial_handler.remove_listener(command)
+        self.stream_commands = []
+
     def update_len_number_window(self, value, number_var):
         try:
             value_len = float(value) if value else 0  # Konwersja wartości na float
         except ValueError:
             if len(self.lendata) > 2:
-                value_len = self.lendata[-1]  # Pobranie ostatniej wartości zamiast listy
+                value_len = self.lendata.last()  # Pobranie ostatniej wartości
             else:
                 value_len = 0
         self.lendata.append(value_len)
+        server = self.telemetry_server
+        if server is not None:
+            server.publish("encoder_1", value_len)
 
         try:
-            number_var.set(float(value_len * self.len_translate))
+            self.ui.set_var(number_var, float(value_len * self.len_translate))
         except TypeError:
             print(f"Błąd konwersji: value_len={value_len}, len_translate={self.len_translate}")
-            number_var.set(0)  # Ustawienie wartości domyślnej w razie błędu
+            self.ui.set_var(number_var, 0)  # Ustawienie wartości domyślnej w razie błędu
 
     def send_write_command(self, command, value):
         if not self.serial_handler.is_connected():
@@ -366,17 +737,14 @@ class MainApp:
 
         full_command = f"{command}_{value}"  # Tworzenie pełnej komendy
         try:
-            self.serial_handler.send_command(full_command)
-            for attempt in range(3):
-                response = self.serial_handler.read_response()
-                if response:
-                    # Weryfikacja odpowiedzi
-                    if command in response and f"{value}" in response:
-                        return response
-                    else:
-                        self.log_output(f"Nieprawidłowa odpowiedź: {response}")
-                        return response
-                self.log_output(f"Próba {attempt + 1} dla komendy {full_command} nie powiodła się.")
+            # Zapis ze wspólnej kolejki z najwyższym priorytetem; aktualizuje kopię rejestrów
+            response = self.connection.write(command, value)
+            if response:
+                # Weryfikacja odpowiedzi
+                if not (command in response and f"{value}" in response):
+                    self.log_output(f"Nieprawidłowa odpowiedź: {response}")
+                    self.serial_handler.diagnostics.record_invalid(command)
+                return response
             self.log_output(f"Nie otrzymano odpowiedzi na komendę: {full_command}")
             return None
         except Exception as e:
@@ -396,16 +764,12 @@ class MainApp:
             return None
 
         try:
-            self.serial_handler.send_command(command)
-            for attempt in range(3):
-                response = self.serial_handler.read_response()
-                if response:
-                    if command.split('_')[0] in response and command in response:
-                        return response
-                    else:
-                        self.log_output(f"Nieprawidłowa odpowiedź: {response}")
-                        return response
-                self.log_output(f"Próba {attempt + 1} dla komendy {command} nie powiodła się.")
+            response = self.connection.transact(command)
+            if response:
+                if not (command.split('_')[0] in response and command in response):
+                    self.log_output(f"Nieprawidłowa odpowiedź: {response}")
+                    self.serial_handler.diagnostics.record_invalid(command)
+                return response
             self.log_output(f"Nie otrzymano odpowiedzi na komendę: {command}")
             return None
         except Exception as e:
@@ -413,9 +777,43 @@ class MainApp:
             return None
 
     def extract_value(self, response):
-        try:
-            if "val=" in response:
-                return response.split("val=")[1].split()[0]
-        except IndexError:
+        reply = parse_reply(response)
+        if reply.status == STATUS_VALUE:
+            return reply.value
+        if "val=" in response:
             return "Błąd parsowania"
-        return "Brak wartości"
\ No newline at end of file
+        return "Brak wartości"
+
+
+class MultiWinderApp:
+    """Kilka nawijarek w jednym oknie - każda w osobnej zakładce z własnym portem, wątkami i stanem."""
+
+    def __init__(self, root, count=2):
+        self.root = root
+        self.root.title("Nawijarki Światłowodów")
+        from device_manager import DeviceManager  # Potrzebny tylko w trybie wielu nawijarek
+        self.device_manager = DeviceManager()
+        self.apps = []
+
+        toolbar = ttk.Frame(self.root)
+        toolbar.pack(fill=tk.X)
+        ttk.Button(toolbar, text="Dodaj nawijarkę", command=self.add_winder).pack(side=tk.LEFT, padx=5, pady=5)
+        self.notebook = ttk.Notebook(self.root)
+        self.notebook.pack(fill=tk.BOTH, expand=True)
+
+        for _ in range(count):
+            self.add_winder()
+
+    def add_winder(self):
+        name = f"Nawijarka {len(self.apps) + 1}"
+        self.device_manager.add(name)
+        frame = ttk.Frame(self.notebook)
+        self.notebook.add(frame, text=name)
+        app = MainApp(self.root, container=frame, device_manager=self.device_manager, name=name)
+        app.telemetry_port = 8765 + len(self.apps)  # Osobny port serwera telemetrii dla każdej nawijarki
+        self.apps.append(app)
+        return app
+
+    def log_output(self, message):
+        # Komunikaty wspólne (np. czas startu) trafiają do konsoli pierwszej nawijarki
+        self.apps[0].log_output(message)
@@ -0,0 +1,7 @@
+def load_numpy():
+    """Zwraca moduł NumPy lub None. Import dopiero przy pierwszym użyciu - start aplikacji go nie potrzebuje."""
+    try:
+        import numpy
+    except ImportError:  # NumPy jest opcjonalny - bez niego moduły korzystają z list i pętli
+        return None
+    return numpy
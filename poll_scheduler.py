@@ -0,0 +1,104 @@
+import heapq
+import itertools
+import threading
+import time
+import traceback
+
+
+class PollTask:
+    """Komenda odpytywana cyklicznie z zadaną częstotliwością [Hz] i priorytetem (większy = ważniejszy)."""
+
+    def __init__(self, command, rate, priority, token):
+        self.command = command
+        self.period = 1.0 / rate
+        self.priority = priority
+        self.token = token  # Unieważnia wpisy kolejki po zmianie lub usunięciu zadania
+
+
+class PollScheduler:
+    """Planista odpytywania: jeden wątek I/O wykonuje wszystkie komendy według terminów zegara monotonicznego.
+
+    Terminy kolejnych odczytów liczone są od poprzedniego terminu (a nie od końca odczytu),
+    więc odstępy nie dryfują. Gdy kilka komend jest zaległych, pierwsza idzie ta o wyższym priorytecie.
+    """
+
+    def __init__(self, poll_func, name="poll-scheduler"):
+        self.poll_func = poll_func  # Wywoływana jako poll_func(command) w wątku planisty
+        self.name = name
+        self._tasks = {}
+        self._timeline = []  # Kopiec (termin, kolejność, token, komenda)
+        self._ready = []  # Kopiec zaległych zadań (-priorytet, termin, kolejność, token, komenda)
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def add(self, command, rate, priority=0):
+        """Dodaje (lub zmienia) cykliczne odpytywanie komendy; pierwszy odczyt następuje od razu."""
+        with self._condition:
+            token = next(self._counter)
+            self._tasks[command] = PollTask(command, rate, priority, token)
+            heapq.heappush(self._timeline, (time.monotonic(), token, token, command))
+            self._ensure_thread()
+            self._condition.notify()
+
+    def remove(self, command):
+        with self._condition:
+            self._tasks.pop(command, None)
+            self._condition.notify()
+
+    def commands(self):
+        with self._condition:
+            return list(self._tasks)
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._tasks.clear()
+            self._timeline.clear()
+            self._ready.clear()
+            self._condition.notify()
+
+    def _ensure_thread(self):
+        self._running = True
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _next_command(self):
+        """Czeka na najbliższe zaległe zadanie i planuje jego kolejny termin. Zwraca None po stop()."""
+        with self._condition:
+            while self._running:
+                now = time.monotonic()
+                while self._timeline and self._timeline[0][0] <= now:
+                    deadline, order, token, command = heapq.heappop(self._timeline)
+                    task = self._tasks.get(command)
+                    if task is not None and task.token == token:
+                        heapq.heappush(self._ready, (-task.priority, deadline, order, token, command))
+
+                while self._ready:
+                    _, deadline, _, token, command = heapq.heappop(self._ready)
+                    task = self._tasks.get(command)
+                    if task is None or task.token != token:
+                        continue
+                    next_deadline = deadline + task.period
+                    if next_deadline <= now:
+                        # Pominięte takty nie są nadrabiane seriami - wracamy na siatkę okresu
+                        missed = int((now - deadline) / task.period)
+                        next_deadline = deadline + (missed + 1) * task.period
+                    heapq.heappush(self._timeline, (next_deadline, next(self._counter), token, command))
+                    return command
+
+                timeout = self._timeline[0][0] - now if self._timeline else None
+                self._condition.wait(timeout)
+            return None
+
+    def _run(self):
+        while True:
+            command = self._next_command()
+            if command is None:
+                return
+            try:
+                self.poll_func(command)
+            except Exception:
+                traceback.print_exc()
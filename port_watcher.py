@@ -0,0 +1,74 @@
+import os
+import threading
+import time
+
+
+class PortWatcher:
+    """Wątek pilnujący połączenia SerialHandler.
+
+    Zerwanie łącza wykrywane jest od razu (błąd odczytu/zapisu w SerialHandler) lub przez cykliczne
+    sprawdzanie, czy plik urządzenia portu nadal istnieje. Po zerwaniu próbuje połączyć się ponownie
+    z odstępem rosnącym wykładniczo od `min_backoff` do `max_backoff` sekund.
+
+    `connect` (domyślnie serial_handler.connect) pozwala łączyć ponownie przez DeviceManager,
+    który sprawdza, czy port nie jest w tym czasie używany przez inną nawijarkę.
+    """
+
+    def __init__(self, serial_handler, on_lost=None, on_restored=None,
+                 presence_interval=1.0, min_backoff=0.1, max_backoff=5.0, connect=None):
+        self.serial_handler = serial_handler
+        self.connect = connect if connect is not None else serial_handler.connect
+        self.on_lost = on_lost  # Wywoływane (w wątku strażnika) po wykryciu zerwania: on_lost(port)
+        self.on_restored = on_restored  # Wywoływane po ponownym połączeniu: on_restored(port, czas przerwy)
+        self.presence_interval = presence_interval
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.port = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self, port):
+        """Zaczyna pilnować połączenia z portem (wywołać po udanym SerialHandler.connect)."""
+        self.stop()
+        self.port = port
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop_event,), name="port-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Kończy pilnowanie (np. przed rozłączeniem przez użytkownika)."""
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self._thread = None
+
+    def port_present(self):
+        if not os.path.isabs(self.port):
+            # Windows (COM3) nie ma pliku urządzenia, a wyliczanie wszystkich portów co sekundę jest kosztowne -
+            # zerwanie wykrywa wtedy błąd odczytu/zapisu (link_lost)
+            return True
+        return os.path.exists(self.port)  # Linux/macOS: /dev/ttyUSB0, pseudoterminale
+
+    def _run(self, stop_event):
+        handler = self.serial_handler
+        while not stop_event.is_set():
+            if not handler.link_lost.wait(self.presence_interval):
+                if stop_event.is_set() or self.port_present():
+                    continue
+                handler.mark_link_lost(Exception(f"Port {self.port} zniknął z systemu."))
+            if stop_event.is_set():
+                return
+
+            lost_at = time.monotonic()
+            if self.on_lost:
+                self.on_lost(self.port)
+            backoff = self.min_backoff
+            while not stop_event.wait(backoff):
+                try:
+                    self.connect(self.port)
+                except Exception:
+                    backoff = min(backoff * 2, self.max_backoff)
+                    continue
+                if self.on_restored:
+                    self.on_restored(self.port, time.monotonic() - lost_at)
+                break
@@ -0,0 +1,290 @@
+import json
+import os
+import threading
+import time
+import traceback
+from datetime import datetime
+
+from device_commands import WRITE_COMMANDS, ACTION_COMMANDS
+from line_protocol import parse_reply, STATUS_DONE
+
+STEP_TYPES = ("ramp", "direction", "wait_length", "hold", "set")
+DIRECTIONS = ("cw", "ccw", "stop")
+
+
+class Recipe:
+    """Sekwencja kroków nawijania wczytana z pliku JSON.
+
+    {"name": "...", "tick": 0.05, "steps": [
+        {"type": "direction", "motor": 1, "dir": "cw"},
+        {"type": "ramp", "register": "pot_1", "to": 200, "duration": 5.0},
+        {"type": "wait_length", "length": 5000, "timeout": 600},
+        {"type": "hold", "duration": 2.0},
+        {"type": "set", "register": "sm1_sd", "value": 1}]}
+
+    `ramp` zmienia rejestr liniowo od wartości "from" (domyślnie ostatnio zapisanej) do "to" w czasie "duration" [s],
+    `wait_length` czeka, aż długość z encoder_1 [mm] osiągnie "length" (przerwanie po "timeout" [s]).
+    """
+
+    def __init__(self, name, steps, tick=None, path=None):
+        self.name = name
+        self.steps = [self.validate_step(index, step) for index, step in enumerate(steps, start=1)]
+        self.tick = tick
+        self.path = path
+        if not self.steps:
+            raise ValueError(f"Receptura {name} nie zawiera kroków.")
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        return cls(data.get("name", os.path.basename(path)), data.get("steps", []), data.get("tick"), path)
+
+    @staticmethod
+    def validate_step(index, step):
+        step = dict(step)
+        kind = step.get("type")
+        if kind not in STEP_TYPES:
+            raise ValueError(f"Krok {index}: nieznany typ {kind!r} (dostępne: {', '.join(STEP_TYPES)})")
+        try:
+            if kind == "ramp":
+                if step["register"] not in WRITE_COMMANDS:
+                    raise ValueError(f"Krok {index}: nieznany rejestr {step['register']}")
+                step["to"] = float(step["to"])
+                step["duration"] = float(step["duration"])
+                if "from" in step:
+                    step["from"] = float(step["from"])
+                if step["duration"] < 0:
+                    raise ValueError(f"Krok {index}: ujemny czas rampy")
+            elif kind == "direction":
+                step["motor"] = int(step["motor"])
+                if step["motor"] not in (1, 2) or step["dir"] not in DIRECTIONS:
+                    raise ValueError(f"Krok {index}: silnik 1/2 i kierunek {'/'.join(DIRECTIONS)}")
+            elif kind == "wait_length":
+                step["length"] = float(step["length"])
+                step["timeout"] = float(step["timeout"]) if step.get("timeout") is not None else None
+            elif kind == "hold":
+                step["duration"] = float(step["duration"])
+            elif kind == "set":
+                if step["register"] not in WRITE_COMMANDS:
+                    raise ValueError(f"Krok {index}: nieznany rejestr {step['register']}")
+                step["value"] = int(step["value"])
+        except KeyError as e:
+            raise ValueError(f"Krok {index} ({kind}): brak pola {e}")
+        except (TypeError, ValueError) as e:
+            if str(e).startswith("Krok"):
+                raise
+            raise ValueError(f"Krok {index} ({kind}): nieprawidłowa wartość ({e})")
+        return step
+
+
+class RecipeAborted(Exception):
+    pass
+
+
+class RecipeExecutor:
+    """Wykonuje recepturę w osobnym wątku, taktując wszystkie zdarzenia terminami bezwzględnymi (time.monotonic).
+
+    Każdy krok ma zaplanowany początek wynikający z planu (koniec poprzedniego kroku), a nie z czasu
+    wykonania poprzednich zapisów - opóźnienia nie kumulują się. Dla każdego kroku mierzone jest spóźnienie
+    startu, a dla każdego taktu spóźnienie potwierdzenia zapisu względem terminu (jitter).
+
+    write_func(rejestr, wartość) - zapis z oczekiwaniem na odpowiedź urządzenia (np. MainApp.send_write_command);
+        zwraca odpowiedź, a brak "done ok" przerywa recepturę,
+    action_func(rejestr, wartość) - jak write_func, dla komend akcji (ACTION_COMMANDS, np. zerowanie enkodera),
+        wysyłanych zawsze, bez pomijania powtórzeń; domyślnie write_func,
+    read_length() - długość [mm] lub None, gdy brak odczytu,
+    on_step(indeks, krok) / on_finish(raport) - wywoływane z wątku wykonawcy.
+    """
+
+    def __init__(self, write_func, read_length, tick=0.05, on_step=None, on_finish=None, name="recipe-executor",
+                 action_func=None):
+        self.write_func = write_func
+        self.action_func = action_func
+        self.read_length = read_length
+        self.tick = tick
+        self.on_step = on_step
+        self.on_finish = on_finish
+        self.name = name
+        self.recipe = None
+        self.step_index = None
+        self._values = {}  # Ostatnio zapisane wartości rejestrów (punkt startu ramp)
+        self._tick_lateness = []
+        self._steps = []
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self, recipe, initial_values=None):
+        if self.is_running():
+            raise Exception("Receptura jest już wykonywana.")
+        self.recipe = recipe
+        self._values = dict(initial_values or {})
+        self._tick_lateness = []
+        self._steps = []
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(recipe, self._stop_event), name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Przerywa recepturę; wątek wykonawcy zatrzymuje silniki."""
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _wait_until(self, deadline, stop_event):
+        """Czeka do terminu bezwzględnego i zwraca spóźnienie [s]."""
+        delay = deadline - time.monotonic()
+        if delay > 0 and stop_event.wait(delay):
+            raise RecipeAborted("Przerwano przez operatora")
+        if stop_event.is_set():
+            raise RecipeAborted("Przerwano przez operatora")
+        return time.monotonic() - deadline
+
+    def _write(self, register, value):
+        # Następny takt/krok dopiero po potwierdzeniu zapisu "done ok"
+        value = int(round(value))
+        if self._values.get(register) != value:
+            self._confirm(register, value, self.write_func(register, value))
+            self._values[register] = value
+
+    def _action(self, register, value):
+        # Akcja zawsze trafia do urządzenia (bez porównania z ostatnią wartością)
+        action_func = self.action_func if self.action_func is not None else self.write_func
+        self._confirm(register, value, action_func(register, value))
+
+    @staticmethod
+    def _confirm(register, value, response):
+        reply = parse_reply(response) if response else None
+        if reply is None or reply.status != STATUS_DONE:
+            raise RecipeAborted(f"brak potwierdzenia {register}_{value} (odpowiedź: {response})")
+
+    def _run(self, recipe, stop_event):
+        tick = recipe.tick or self.tick
+        started = time.monotonic()
+        deadline = started
+        status = "zakończona"
+        try:
+            for index, step in enumerate(recipe.steps):
+                self.step_index = index
+                lateness = self._wait_until(deadline, stop_event)
+                record = {"step": index + 1, "type": step["type"], "planned_s": round(deadline - started, 4),
+                          "start_lateness_ms": round(lateness * 1000, 3)}
+                self._steps.append(record)
+                if self.on_step is not None:
+                    self.on_step(index, step)
+                deadline = self._run_step(step, deadline, tick, stop_event)
+                record["end_s"] = round(deadline - started, 4)
+        except RecipeAborted as e:
+            status = f"przerwana: {e}"
+            self._stop_motors()
+        except Exception as e:
+            traceback.print_exc()
+            status = f"błąd: {e}"
+            self._stop_motors()
+        finally:
+            self.step_index = None
+        report = self.report(status, time.monotonic() - started)
+        if self.on_finish is not None:
+            self.on_finish(report)
+
+    def _run_step(self, step, start, tick, stop_event):
+        """Wykonuje krok zaplanowany na `start` i zwraca planowany termin jego końca."""
+        kind = step["type"]
+        if kind == "direction":
+            motor, direction = step["motor"], step["dir"]
+            # Najpierw wyłączenie przeciwnego kierunku, jak w MainApp.update_radio_status
+            if direction == "cw":
+                self._write(f"sm{motor}_ccw", 0)
+                self._write(f"sm{motor}_cw", 1)
+            elif direction == "ccw":
+                self._write(f"sm{motor}_cw", 0)
+                self._write(f"sm{motor}_ccw", 1)
+            else:
+                self._write(f"sm{motor}_ccw", 0)
+                self._write(f"sm{motor}_cw", 0)
+            return start
+        if kind == "set":
+            if step["register"] in ACTION_COMMANDS:
+                self._action(step["register"], step["value"])
+            else:
+                self._write(step["register"], step["value"])
+            return start
+        if kind == "hold":
+            return start + step["duration"]
+        if kind == "ramp":
+            register, target, duration = step["register"], step["to"], step["duration"]
+            origin = step.get("from", self._values.get(register, 0))
+            ticks = max(1, int(round(duration / tick)))
+            for k in range(ticks + 1):
+                # Wartość wynika z planowanego czasu taktu, nie z chwili faktycznego wykonania
+                deadline = start + duration * k / ticks
+                if k:
+                    self._wait_until(deadline, stop_event)
+                self._write(register, origin + (target - origin) * k / ticks)
+                if k:
+                    # Spóźnienie liczone do potwierdzenia zapisu, a nie do jego zlecenia
+                    self._tick_lateness.append(time.monotonic() - deadline)
+            return start + duration
+        if kind == "wait_length":
+            target, timeout = step["length"], step["timeout"]
+            k = 0
+            while True:
+                deadline = start + k * tick
+                if k:
+                    self._tick_lateness.append(self._wait_until(deadline, stop_event))
+                length = self.read_length()
+                if length is not None and length >= target:
+                    return deadline
+                if timeout is not None and deadline - start >= timeout:
+                    raise RecipeAborted(f"nie osiągnięto długości {target} mm w {timeout} s")
+                k += 1
+        raise ValueError(f"Nieznany typ kroku: {kind}")
+
+    def _stop_motors(self):
+        for motor in (1, 2):
+            for register in (f"sm{motor}_ccw", f"sm{motor}_cw"):
+                try:
+                    self.write_func(register, 0)
+                    self._values[register] = 0
+                except Exception:
+                    traceback.print_exc()
+
+    def report(self, status=None, elapsed=None):
+        """Raport wykonania: czasy kroków oraz spóźnienia taktów względem terminów [ms]."""
+        lateness = sorted(self._tick_lateness)
+        steps = list(self._steps)
+        step_lateness = sorted(step["start_lateness_ms"] for step in steps)
+
+        def at(values, fraction):
+            return values[min(len(values) - 1, int(fraction * len(values)))] if values else None
+
+        return {
+            "recipe": self.recipe.name if self.recipe else None,
+            "finished": datetime.now().isoformat(timespec="seconds"),
+            "status": status,
+            "elapsed_s": round(elapsed, 4) if elapsed is not None else None,
+            "tick_ms": round((self.recipe.tick or self.tick) * 1000, 3) if self.recipe else None,
+            "ticks": len(lateness),
+            "tick_jitter_ms": {
+                "mean": round(sum(lateness) / len(lateness) * 1000, 3) if lateness else None,
+                "p95": round(at(lateness, 0.95) * 1000, 3) if lateness else None,
+                "max": round(lateness[-1] * 1000, 3) if lateness else None,
+            },
+            "step_jitter_ms": {
+                "p95": at(step_lateness, 0.95),
+                "max": step_lateness[-1] if step_lateness else None,
+            },
+            "steps": steps,
+        }
+
+    @staticmethod
+    def export_report(report, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+        return path
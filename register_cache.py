@@ -0,0 +1,144 @@
+import threading
+import time
+import traceback
+from collections import OrderedDict
+
+from device_commands import WRITE_COMMANDS, ACTION_COMMANDS
+
+
+class RegisterShadow:
+    """Kopia ostatnich potwierdzonych ("done ok") wartości rejestrów zapisu urządzenia.
+
+    Komendy akcji (ACTION_COMMANDS, np. zerowanie enkodera) nie są rejestrami - nigdy nie trafiają do kopii.
+    """
+
+    def __init__(self, registers=WRITE_COMMANDS):
+        self.registers = set(registers) - ACTION_COMMANDS
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, default=None):
+        with self._lock:
+            return self._values.get(name, default)
+
+    def matches(self, name, value):
+        """True, jeśli urządzenie potwierdziło już dokładnie tę wartość - zapis można pominąć."""
+        if name not in self.registers:
+            return False
+        with self._lock:
+            return name in self._values and self._values[name] == str(value)
+
+    def confirm(self, name, value):
+        if name in self.registers:
+            with self._lock:
+                self._values[name] = str(value)
+
+    def invalidate(self, name=None):
+        """Zapomina wartość rejestru (lub wszystkich, np. po ponownym połączeniu)."""
+        with self._lock:
+            if name is None:
+                self._values.clear()
+            else:
+                self._values.pop(name, None)
+
+
+class WriteCoalescer:
+    """Kolejka zapisów rejestrów obsługiwana przez jeden wątek.
+
+    Zapis do rejestru, który już czeka w kolejce, zastępuje poprzednią wartość (wychodzi tylko najnowsza)
+    i przesuwa rejestr na koniec kolejki, więc zachowana jest kolejność ostatnich decyzji
+    (np. sm1_ccw=0 przed sm1_cw=1). Zapisy zgodne z kopią rejestrów są pomijane (komendy akcji nigdy).
+    """
+
+    def __init__(self, write_func, shadow, name="write-coalescer"):
+        self.write_func = write_func  # write_func(rejestr, wartość) -> odpowiedź urządzenia lub None
+        self.shadow = shadow
+        self.name = name
+        self.skipped = 0  # Zapisy pominięte, bo urządzenie ma już tę wartość
+        self.coalesced = 0  # Zapisy zastąpione nowszą wartością przed wysłaniem
+        self._pending = OrderedDict()
+        self._busy = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def submit(self, name, value):
+        with self._condition:
+            if name in self._pending:
+                self.coalesced += 1
+                self._pending.move_to_end(name)
+            self._pending[name] = value
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        """Czeka, aż wszystkie zlecone zapisy zostaną wysłane. Zwraca False po przekroczeniu czasu."""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()
+                if not self._condition.wait_for(lambda: self._pending, timeout=5.0):
+                    self._thread = None
+                    return  # Wątek kończy się po chwili bezczynności i startuje ponownie przy submit
+                name, value = self._pending.popitem(last=False)
+                self._busy = True
+            if self.shadow.matches(name, value):
+                self.skipped += 1
+                continue
+            try:
+                self.write_func(name, value)
+            except Exception:
+                traceback.print_exc()
+
+
+# Czas ważności [s] odczytów rejestrów, które zmieniają się tylko przez zapis z aplikacji
+DEFAULT_READ_TTL = {
+    "hx_gain": 30.0, "led_blue": 30.0, "led_green": 30.0, "pot_wp": 30.0,
+    "zero_1": 10.0, "zero_2": 10.0,
+    "smc124_dir": 5.0, "sm1_cw": 5.0, "sm1_ccw": 5.0, "sm2_cw": 5.0, "sm2_ccw": 5.0,
+}
+
+
+class ReadCache:
+    """Pamięć podręczna odpowiedzi na odczyt z czasem ważności ustawianym per rejestr.
+
+    Rejestry spoza `ttls` (np. hx_read, encoder_*) nigdy nie są buforowane.
+    Zapis do rejestru powinien wywołać invalidate(rejestr).
+    """
+
+    def __init__(self, ttls=None):
+        self.ttls = dict(DEFAULT_READ_TTL if ttls is None else ttls)
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}  # Rejestr -> (czas wygaśnięcia wg time.monotonic, odpowiedź)
+        self._lock = threading.Lock()
+
+    def get(self, command):
+        """Zwraca zapamiętaną odpowiedź, jeśli jest jeszcze ważna, w przeciwnym razie None."""
+        if command not in self.ttls:
+            return None
+        with self._lock:
+            entry = self._entries.get(command)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, command, response):
+        ttl = self.ttls.get(command)
+        if ttl:
+            with self._lock:
+                self._entries[command] = (time.monotonic() + ttl, response)
+
+    def invalidate(self, command=None):
+        with self._lock:
+            if command is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(command, None)
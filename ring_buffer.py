@@ -0,0 +1,148 @@
+from array import array
+from collections import deque
+
+
+class WindowStats:
+    """Statystyki kroczące (suma, suma kwadratów, min, max) dla ostatnich `size` próbek."""
+
+    def __init__(self, size):
+        self.size = size
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self._min = deque()  # Kolejka monotoniczna (indeks, wartość) - rosnąco
+        self._max = deque()  # Kolejka monotoniczna (indeks, wartość) - malejąco
+
+    def push(self, index, value, dropped):
+        """Dodaje próbkę o indeksie `index`; `dropped` to wartość wypadająca z okna (lub None)."""
+        self.sum += value
+        self.sum_sq += value * value
+        if dropped is not None:
+            self.sum -= dropped
+            self.sum_sq -= dropped * dropped
+
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((index, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((index, value))
+
+        oldest = index - self.size
+        if self._min[0][0] <= oldest:
+            self._min.popleft()
+        if self._max[0][0] <= oldest:
+            self._max.popleft()
+
+    def reset(self, start_index, values):
+        """Przelicza statystyki od zera dla podanych wartości (usuwa błąd zaokrągleń sum)."""
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self._min.clear()
+        self._max.clear()
+        for offset, value in enumerate(values):
+            self.push(start_index + offset, value, None)
+
+    @property
+    def min(self):
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self):
+        return self._max[0][1] if self._max else None
+
+
+class RingSeries:
+    """Bufor cykliczny liczb o stałym rozmiarze ze statystykami liczonymi w czasie O(1) na próbkę."""
+
+    def __init__(self, capacity, windows=()):
+        if capacity < 1:
+            raise ValueError("Pojemność bufora musi być dodatnia.")
+        self.capacity = capacity
+        self._data = array('d', bytes(8 * capacity))
+        self._count = 0  # Liczba wszystkich dodanych próbek
+        self._windows = {}
+        for size in windows:
+            self.add_window(size)
+
+    def add_window(self, size):
+        """Rejestruje okno statystyk o rozmiarze `size` (nie większym niż pojemność bufora)."""
+        if not 1 <= size <= self.capacity:
+            raise ValueError(f"Okno {size} poza zakresem 1..{self.capacity}.")
+        if size not in self._windows:
+            stats = WindowStats(size)
+            start = max(0, self._count - size)
+            stats.reset(start, self.values(size))
+            self._windows[size] = stats
+        return self._windows[size]
+
+    def append(self, value):
+        value = float(value)
+        index = self._count
+        slot = index % self.capacity
+        for size, stats in self._windows.items():
+            dropped = self._data[(index - size) % self.capacity] if index >= size else None
+            stats.push(index, value, dropped)
+        self._data[slot] = value
+        self._count += 1
+        # Okresowe przeliczenie sum - koszt O(okno) raz na `okno` próbek, czyli O(1) w średnim ujęciu
+        for size, stats in self._windows.items():
+            if self._count % (size * 64) == 0:
+                stats.reset(self._count - size, self.values(size))
+
+    def clear(self):
+        self._count = 0
+        for stats in self._windows.values():
+            stats.reset(0, ())
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    def __iter__(self):
+        return iter(self.values())
+
+    @property
+    def total_count(self):
+        """Liczba wszystkich próbek dodanych od utworzenia bufora."""
+        return self._count
+
+    def last(self, default=None):
+        if not self._count:
+            return default
+        return self._data[(self._count - 1) % self.capacity]
+
+    def values(self, window=None):
+        """Zwraca listę ostatnich `window` próbek (od najstarszej)."""
+        size = len(self) if window is None else min(window, len(self))
+        start = self._count - size
+        return [self._data[i % self.capacity] for i in range(start, self._count)]
+
+    def _stats(self, window):
+        size = self.capacity if window is None else window
+        stats = self._windows.get(size)
+        return stats if stats is not None else self.add_window(size)
+
+    def sum(self, window=None):
+        return self._stats(window).sum
+
+    def mean(self, window=None):
+        stats = self._stats(window)
+        size = min(stats.size, self._count)
+        return stats.sum / size if size else None
+
+    def variance(self, window=None):
+        stats = self._stats(window)
+        size = min(stats.size, self._count)
+        if not size:
+            return None
+        mean = stats.sum / size
+        return max(stats.sum_sq / size - mean * mean, 0.0)
+
+    def std(self, window=None):
+        variance = self.variance(window)
+        return variance ** 0.5 if variance is not None else None
+
+    def min(self, window=None):
+        return self._stats(window).min
+
+    def max(self, window=None):
+        return self._stats(window).max
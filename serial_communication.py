@@ -1,43 +1,219 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
 import serial
-import serial.tools.list_ports
+
+from device_commands import READ_COMMANDS
+from diagnostics import Diagnostics, command_name
+from line_protocol import LineFramer
 
 class SerialHandler:
     def __init__(self):
         self.serial_port = None
         self.baudrate = 115200  # Domyślna prędkość transmisji
+        self.response_timeout = 1.0  # Domyślny czas oczekiwania na odpowiedź [s]
+        self.read_timeout = 0.05  # Czas blokowania pojedynczego odczytu w wątku czytającym [s]
+        self.retries = 1  # Liczba ponownych wysłań komendy w transact po przekroczeniu czasu
+        self.diagnostics = Diagnostics()  # Opóźnienia i liczniki błędów per komenda
+
+        self._write_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._pending = deque()  # Kolejka (komenda, Future) oczekujących na odpowiedź
+        self.unmatched_lines = 0  # Linie bez oczekującej komendy i bez słuchacza (pomijane)
+        self.late_replies = 0  # Odpowiedzi na komendy, które już nie czekają (np. po przekroczeniu czasu)
+        self._listeners = {}  # Nazwa komendy -> funkcja wywoływana dla linii strumienia
+        self._reader_thread = None
+        self._stop_event = threading.Event()
+        self.port_name = None
+        self.link_lost = threading.Event()  # Ustawiane, gdy łącze zostało zerwane (nie przez disconnect)
 
     def get_available_ports(self):
         """Zwraca listę dostępnych portów COM."""
+        import serial.tools.list_ports  # Moduł wyliczania portów ładowany dopiero przy pierwszym użyciu
         return [port.device for port in serial.tools.list_ports.comports()]
 
     def connect(self, port):
-        """Łączy się z wybranym portem COM."""
+        """Łączy się z wybranym portem COM i uruchamia wątek czytający."""
         if self.serial_port:
             self.disconnect()
-        self.serial_port = serial.Serial(port, self.baudrate, timeout=1)
+        self.serial_port = serial.Serial(port, self.baudrate, timeout=self.read_timeout)
+        self.port_name = port
+        self.link_lost.clear()
+        self._stop_event.clear()
+        self._reader_thread = threading.Thread(target=self._reader_loop, name=f"serial-reader-{port}", daemon=True)
+        self._reader_thread.start()
 
     def disconnect(self):
         """Rozłącza aktywne połączenie szeregowe."""
+        self._stop_event.set()
         if self.serial_port and self.serial_port.is_open:
             self.serial_port.close()
+        if self._reader_thread and self._reader_thread is not threading.current_thread():
+            self._reader_thread.join(timeout=1)
+        self._reader_thread = None
         self.serial_port = None
+        self._fail_pending(Exception("Port szeregowy został rozłączony."))
 
     def is_connected(self):
         """Sprawdza, czy połączenie szeregowe jest aktywne."""
         return self.serial_port is not None and self.serial_port.is_open
 
     def send_command(self, command):
-        """Wysyła komendę przez port szeregowy."""
+        """Wysyła komendę przez port szeregowy i zwraca Future z odpowiedzią."""
         if not self.is_connected():
             raise Exception("Port szeregowy nie jest podłączony.")
-        self.serial_port.write((command + "\n").encode('utf-8'))
+        future = Future()
+        future.command = command
+        # Rejestracja i zapis pod jedną blokadą, aby kolejność oczekujących odpowiadała kolejności na łączu
+        with self._write_lock:
+            future.sent_at = time.perf_counter()
+            with self._pending_lock:
+                self._pending.append((command, future))
+            try:
+                self.serial_port.write((command + "\n").encode('utf-8'))
+            except Exception as e:
+                self._discard_pending(future)
+                self.diagnostics.record_error(command)
+                self.mark_link_lost(e)
+                raise
+        return future
 
-    def read_response(self):
-        """Odczytuje dane z portu szeregowego i zwraca odebraną wiadomość."""
-        if not self.is_connected():
-            raise Exception("Port szeregowy nie jest podłączony.")
-        response = b""
-        while self.serial_port.in_waiting > 0:
-            response += self.serial_port.read(self.serial_port.in_waiting)
-        return response.decode('utf-8').strip() if response else None
+    def transact(self, command, timeout=None):
+        """Wysyła komendę i czeka na odpowiedź (z self.retries powtórzeniami). Zwraca None po przekroczeniu czasu."""
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.diagnostics.record_retry(command)
+            response = self.wait_response(self.send_command(command), timeout)
+            if response is not None:
+                return response
+        return None
+
+    def wait_response(self, future, timeout=None):
+        """Czeka na odpowiedź dla Future zwróconego przez send_command. Zwraca None po przekroczeniu czasu."""
+        try:
+            return future.result(timeout=self.response_timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            self._discard_pending(future)
+            self.diagnostics.record_timeout(future.command)
+            return None
+
+    def send_batch(self, commands, max_in_flight=8, timeout=None):
+        """Wysyła komendy potokowo (najwyżej max_in_flight bez odpowiedzi) i zwraca słownik {komenda: odpowiedź}."""
+        responses = {}
+        in_flight = deque()
+        for command in commands:
+            if len(in_flight) >= max_in_flight:
+                done_command, future = in_flight.popleft()
+                responses[done_command] = self.wait_response(future, timeout)
+            in_flight.append((command, self.send_command(command)))
+        while in_flight:
+            done_command, future = in_flight.popleft()
+            responses[done_command] = self.wait_response(future, timeout)
+        return responses
+
+    def mark_link_lost(self, error):
+        """Zamyka port po błędzie łącza (np. odłączenie USB) i powiadamia oczekujących."""
+        if self._stop_event.is_set():
+            return
+        self._stop_event.set()
+        port = self.serial_port
+        try:
+            if port is not None:
+                port.close()
+        except Exception:
+            pass
+        self._fail_pending(error)
+        self.link_lost.set()
+
+    def add_listener(self, command, callback):
+        """Rejestruje funkcję wywoływaną (w wątku czytającym) dla linii wysyłanych przez urządzenie bez zapytania."""
+        with self._pending_lock:
+            self._listeners[command] = callback
+
+    def remove_listener(self, command):
+        """Usuwa funkcję zarejestrowaną przez add_listener."""
+        with self._pending_lock:
+            self._listeners.pop(command, None)
+
+    def _reader_loop(self):
+        """Wątek czytający: dzieli odebrane bajty na linie i przekazuje je oczekującym komendom."""
+        framer = LineFramer()  # Jeden bufor na całe połączenie - bez kopiowania reszty przy każdej linii
+        port = self.serial_port
+        while not self._stop_event.is_set():
+            try:
+                data = port.read(max(1, port.in_waiting))
+            except Exception as e:
+                if not self._stop_event.is_set():
+                    self.mark_link_lost(e)
+                break
+            if not data:
+                continue
+            for line in framer.feed(data):
+                self._dispatch_line(line)
+
+    def _dispatch_line(self, line):
+        """Przypisuje linię do oczekującej komendy lub strumienia (wg nazwy, potem wg kolejności)."""
+        name = line.split(None, 1)[0]
+        listener = None
+        with self._pending_lock:
+            entry = self._match_pending_name(name)
+            if entry is None:
+                listener = self._listeners.get(name)
+                if listener is None:
+                    if self._is_known_command(name):
+                        # Spóźniona odpowiedź na komendę, która już nie czeka - nie może trafić do innej komendy
+                        self.late_replies += 1
+                        return
+                    entry = self._match_pending(line)
+            if entry is not None:
+                self._pending.remove(entry)
+            elif listener is None:
+                # Linie wysyłane przez urządzenie z własnej inicjatywy odbiera się przez add_listener
+                self.unmatched_lines += 1
+                return
+        if listener is not None:
+            listener(line)
+            return
+        future = entry[1]
+        if future.set_running_or_notify_cancel():
+            self.diagnostics.record_latency(future.command, time.perf_counter() - future.sent_at)
+            future.set_result(line)
+
+    @staticmethod
+    def _is_known_command(name):
+        """Czy pierwsze słowo linii to komenda protokołu (odczyt lub zapis "rejestr_wartość")."""
+        return name in READ_COMMANDS or command_name(name) != name
+
+    def _match_pending_name(self, name):
+        for entry in self._pending:
+            if entry[0] == name:
+                return entry
+        return None
+
+    def _match_pending(self, line):
+        """Linia bez rozpoznanej nazwy komendy (np. samo "error")."""
+        if not self._pending:
+            return None
+        for entry in self._pending:
+            if entry[0] in line:
+                return entry
+        # Urządzenie odpowiada w kolejności komend - najstarsza komenda dostaje nierozpoznaną odpowiedź
+        return self._pending[0]
+
+    def _discard_pending(self, future):
+        with self._pending_lock:
+            for entry in self._pending:
+                if entry[1] is future:
+                    self._pending.remove(entry)
+                    break
 
+    def _fail_pending(self, error):
+        with self._pending_lock:
+            pending = list(self._pending)
+            self._pending.clear()
+        for _, future in pending:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
@@ -0,0 +1,205 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+from serial_communication import SerialHandler
+from register_cache import RegisterShadow, ReadCache
+
+# Priorytety komend (mniejsza liczba = pierwszeństwo)
+PRIORITY_CONTROL = 0  # Zapisy i odczyty pętli sterowania
+PRIORITY_READ = 1  # Odczyty okna głównego (autoupdate, przyciski)
+PRIORITY_DIAGNOSTIC = 2  # Odczyty okna Debug
+
+
+class _Request:
+    def __init__(self, command, priority, client):
+        self.command = command
+        self.priority = priority
+        self.client = client
+        self.future = None  # Future z SerialHandler.send_command po wysłaniu
+        self.error = None
+        self.taken = False  # Pobrane z kolejki przez wątek wysyłający
+        self.cancelled = False
+        self.dispatched = threading.Event()
+
+
+class SharedConnection:
+    """Jedno połączenie z urządzeniem współdzielone przez okno główne i okno Debug.
+
+    Komendy trafiają do kolejki i są wysyłane przez jeden wątek wg priorytetu (zapisy sterujące przed odczytami
+    diagnostycznymi), a w obrębie priorytetu na zmianę dla każdego klienta (round robin), więc seria odczytów
+    jednego okna nie blokuje drugiego. Liczba komend bez odpowiedzi jest ograniczona per priorytet:
+    odczyty nigdy nie zajmują wszystkich miejsc (jedno zostaje dla sterowania). Dopóki trwa ruch sterujący
+    (komenda sterująca w ciągu ostatnich `control_hold` sekund), odczyty diagnostyczne mają najwyżej
+    `diagnostic_in_flight` miejsc, aby komenda sterująca nie czekała za długą serią w urządzeniu;
+    bez sterowania korzystają z pełnego potoku.
+
+    Obiekt trzyma też wspólne pamięci podręczne: kopię rejestrów zapisu i odczyty z czasem ważności.
+    """
+
+    def __init__(self, serial_handler=None, max_in_flight=8, diagnostic_in_flight=2, queue_timeout=5.0,
+                 control_hold=1.0):
+        self.serial_handler = serial_handler if serial_handler is not None else SerialHandler()
+        self.limits = {
+            PRIORITY_CONTROL: max_in_flight,
+            PRIORITY_READ: max(1, max_in_flight - 1),
+            PRIORITY_DIAGNOSTIC: max(1, max_in_flight - 1),
+        }
+        self.diagnostic_in_flight = max(1, min(diagnostic_in_flight, max_in_flight - 1))  # Limit przy sterowaniu
+        self.control_hold = control_hold  # Czas [s] od ostatniej komendy sterującej, przez który trwa limit
+        self._last_control = None  # time.monotonic() ostatniej komendy sterującej
+        self.queue_timeout = queue_timeout  # Maksymalny czas oczekiwania w kolejce [s]
+        self.register_shadow = RegisterShadow()
+        self.read_cache = ReadCache()
+        self._queues = {priority: OrderedDict() for priority in self.limits}  # Priorytet -> klient -> kolejka
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._thread = None
+
+    # Dostęp do stanu połączenia - bez kolejki
+    @property
+    def diagnostics(self):
+        return self.serial_handler.diagnostics
+
+    @property
+    def baudrate(self):
+        return self.serial_handler.baudrate
+
+    def get_available_ports(self):
+        return self.serial_handler.get_available_ports()
+
+    def is_connected(self):
+        return self.serial_handler.is_connected()
+
+    def connect(self, port):
+        self.serial_handler.connect(port)
+        self.invalidate_caches()
+
+    def disconnect(self):
+        self.serial_handler.disconnect()
+
+    def invalidate_caches(self):
+        """Stan urządzenia po (ponownym) połączeniu jest nieznany."""
+        self.register_shadow.invalidate()
+        self.read_cache.invalidate()
+
+    # Kolejka komend
+    def request(self, command, priority=PRIORITY_READ, client="main"):
+        """Dodaje komendę do kolejki i zwraca żądanie; odpowiedź odbiera wait()."""
+        request = _Request(command, priority, client)
+        with self._condition:
+            if priority == PRIORITY_CONTROL:
+                self._last_control = time.monotonic()
+            self._queues[priority].setdefault(client, deque()).append(request)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="shared-connection", daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+        return request
+
+    def wait(self, request, timeout=None):
+        """Czeka na wysłanie komendy, a potem na odpowiedź. Zwraca None po przekroczeniu czasu."""
+        if not request.dispatched.wait(self.queue_timeout):
+            with self._condition:
+                if not request.taken:
+                    request.cancelled = True
+                    self.diagnostics.record_timeout(request.command)
+                    return None
+            request.dispatched.wait()  # Komenda właśnie jest wysyłana - odpowiedź odbieramy normalnie
+        if request.error is not None:
+            raise request.error
+        return self.serial_handler.wait_response(request.future, timeout)
+
+    def transact(self, command, timeout=None, priority=PRIORITY_READ, client="main"):
+        """Jak SerialHandler.transact, ale przez wspólną kolejkę."""
+        for attempt in range(self.serial_handler.retries + 1):
+            if attempt:
+                self.diagnostics.record_retry(command)
+            response = self.wait(self.request(command, priority, client), timeout)
+            if response is not None:
+                return response
+        return None
+
+    def send_batch(self, commands, max_in_flight=8, timeout=None, priority=PRIORITY_DIAGNOSTIC, client="debug"):
+        """Seria odczytów: najwyżej max_in_flight komend serii naraz w kolejce lub w locie.
+
+        Dodatkowo obowiązuje limit priorytetu (limit()), np. mniejszy dla odczytów diagnostycznych podczas sterowania.
+        """
+        responses = {}
+        in_flight = deque()
+        for command in commands:
+            if len(in_flight) >= max_in_flight:
+                done_command, request = in_flight.popleft()
+                responses[done_command] = self.wait(request, timeout)
+            in_flight.append((command, self.request(command, priority, client)))
+        while in_flight:
+            done_command, request = in_flight.popleft()
+            responses[done_command] = self.wait(request, timeout)
+        return responses
+
+    def write(self, command, value, priority=PRIORITY_CONTROL, client="main"):
+        """Zapis rejestru z aktualizacją wspólnych pamięci podręcznych. Zwraca odpowiedź urządzenia lub None."""
+        self.read_cache.invalidate(command)  # Po zapisie następny odczyt musi trafić do urządzenia
+        response = self.transact(f"{command}_{value}", priority=priority, client=client)
+        if response and command in response and f"{value}" in response and "done ok" in response:
+            self.register_shadow.confirm(command, value)
+        else:
+            self.register_shadow.invalidate(command)
+        return response
+
+    def queued(self):
+        with self._condition:
+            return {priority: sum(len(queue) for queue in clients.values())
+                    for priority, clients in self._queues.items()}
+
+    def limit(self, priority):
+        """Bieżący limit komend w locie dla priorytetu."""
+        if priority == PRIORITY_DIAGNOSTIC and self.control_active():
+            return self.diagnostic_in_flight
+        return self.limits[priority]
+
+    def control_active(self):
+        last = self._last_control
+        return last is not None and time.monotonic() - last < self.control_hold
+
+    def _next_request(self):
+        # Najwyższy priorytet, dla którego jest wolne miejsce; w jego obrębie kolejny klient (round robin)
+        for priority, clients in self._queues.items():
+            if not clients or self._in_flight >= self.limit(priority):
+                continue
+            client, queue = next(iter(clients.items()))
+            request = queue.popleft()
+            if queue:
+                clients.move_to_end(client)
+            else:
+                del clients[client]
+            return request
+        return None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                request = None
+                while request is None:
+                    request = self._next_request()
+                    if request is None and not self._condition.wait(timeout=5.0):
+                        if not any(self._queues.values()):
+                            self._thread = None
+                            return  # Wątek kończy się po chwili bezczynności i startuje ponownie przy request
+                    elif request is not None and request.cancelled:
+                        request = None  # Oczekujący zrezygnował - komenda nie jest wysyłana
+                request.taken = True
+                self._in_flight += 1
+            try:
+                request.future = self.serial_handler.send_command(request.command)
+            except Exception as e:
+                request.error = e
+                self._release(None)
+            else:
+                request.future.add_done_callback(self._release)
+            request.dispatched.set()
+
+    def _release(self, future):
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
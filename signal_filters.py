@@ -0,0 +1,302 @@
+import bisect
+import math
+from collections import deque
+
+from ring_buffer import RingSeries
+from optional_numpy import load_numpy
+
+# Filtry do wyboru w interfejsie; dowolne inne parametry można wpisać ręcznie, np. "ma:25", "ema:0.05"
+FILTER_PRESETS = ("raw", "ma:5", "ma:10", "ema:0.2", "median:5", "kalman:1:100")
+# Górna granica okna średniej/mediany - bufor okna alokowany jest od razu
+MAX_WINDOW = 10_000
+
+
+def _window_size(window, name):
+    """Rozmiar okna jako liczba całkowita 1..MAX_WINDOW (odrzuca np. "ma:inf", "ma:1e9", "ma:2.5")."""
+    if isinstance(window, float) and not (math.isfinite(window) and window.is_integer()):
+        raise ValueError(f"Okno {name} musi być liczbą całkowitą.")
+    window = int(window)
+    if not 1 <= window <= MAX_WINDOW:
+        raise ValueError(f"Okno {name} musi mieć od 1 do {MAX_WINDOW} próbek.")
+    return window
+
+
+class SignalFilter:
+    """Filtr sygnału: próbka po próbce (update, stały czas) lub dla całej tablicy (process).
+
+    `ready` mówi, czy filtr zebrał już dość próbek, aby wynik był miarodajny (np. pełne okno średniej).
+    """
+
+    spec = ""
+    label = ""
+
+    def update(self, value):
+        raise NotImplementedError
+
+    def reset(self):
+        raise NotImplementedError
+
+    @property
+    def ready(self):
+        raise NotImplementedError
+
+    def prime(self, values):
+        """Przepuszcza historię próbek przez filtr (np. po zmianie filtra w trakcie pracy)."""
+        result = None
+        for value in values:
+            result = self.update(value)
+        return result
+
+    def spawn(self):
+        """Nowy filtr o tych samych parametrach i pustym stanie."""
+        return create_filter(self.spec)
+
+    def process(self, values):
+        """Filtruje całą tablicę od pustego stanu (stan tego obiektu się nie zmienia).
+
+        Z NumPy zwraca ndarray liczony wektorowo, bez NumPy listę. Wynik jest zgodny z kolejnymi update().
+        """
+        np = load_numpy()
+        if np is None:
+            fresh = self.spawn()
+            return [fresh.update(value) for value in values]
+        values = np.asarray(values, dtype=float)
+        if not len(values):
+            return values.copy()
+        return self._process_numpy(np, values)
+
+    def _process_numpy(self, np, values):
+        fresh = self.spawn()
+        return np.array([fresh.update(value) for value in values.tolist()])
+
+
+class PassThrough(SignalFilter):
+    """Bez filtrowania (dawny tryb RAW)."""
+
+    spec = "raw"
+    label = "RAW"
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._count = 0
+
+    @property
+    def ready(self):
+        return self._count > 0
+
+    def update(self, value):
+        self._count += 1
+        return value
+
+    def _process_numpy(self, np, values):
+        return values.copy()
+
+
+class MovingAverage(SignalFilter):
+    """Średnia krocząca z `window` próbek - suma krocząca w buforze cyklicznym.
+
+    Przed zapełnieniem okna zwraca średnią z dostępnych próbek (ready = False).
+    """
+
+    def __init__(self, window):
+        window = _window_size(window, "średniej")
+        self.window = window
+        self.spec = f"ma:{window}"
+        self.label = f"Średnia ({window})"
+        self.reset()
+
+    def reset(self):
+        self._series = RingSeries(self.window, windows=(self.window,))
+
+    @property
+    def ready(self):
+        return len(self._series) >= self.window
+
+    def update(self, value):
+        self._series.append(value)
+        return self._series.mean(self.window)
+
+    def _process_numpy(self, np, values):
+        # Sumy liczone względem pierwszej próbki - przy odczytach rzędu 1e4 błąd zaokrągleń nie narasta
+        offset = values[0]
+        sums = np.concatenate(([0.0], np.cumsum(values - offset)))
+        index = np.arange(1, len(values) + 1)
+        start = np.maximum(index - self.window, 0)
+        return offset + (sums[index] - sums[start]) / (index - start)
+
+
+def _ema_numpy(np, values, alpha, previous):
+    """y[k] = (1 - alpha) * y[k-1] + alpha * x[k] wektorowo.
+
+    Rozwiązanie jawne y[k] = b^(k+1) * (y[-1] + alpha * sum(x[i] * b^-(i+1))) liczone w blokach,
+    w których b^-n nie przekracza 1e100 - bez przepełnienia i z dokładnością zwykłej pętli.
+    """
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        return values.copy()
+    block = max(1, min(len(values), int(100 * math.log(10) / -math.log(decay))))
+    powers = decay ** np.arange(1, block + 1)
+    output = np.empty_like(values)
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        scale = powers[:len(chunk)]
+        output[start:start + len(chunk)] = scale * (previous + alpha * np.cumsum(chunk / scale))
+        previous = output[start + len(chunk) - 1]
+    return output
+
+
+class ExponentialMovingAverage(SignalFilter):
+    """Średnia wykładnicza: y += alpha * (x - y); pierwsza próbka inicjuje wynik."""
+
+    def __init__(self, alpha):
+        alpha = float(alpha)
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError("Współczynnik EMA musi należeć do przedziału (0, 1].")
+        self.alpha = alpha
+        self.spec = f"ema:{alpha:g}"
+        self.label = f"EMA ({alpha:g})"
+        self.reset()
+
+    def reset(self):
+        self._value = None
+
+    @property
+    def ready(self):
+        return self._value is not None
+
+    def update(self, value):
+        if self._value is None:
+            self._value = float(value)
+        else:
+            self._value += self.alpha * (value - self._value)
+        return self._value
+
+    def _process_numpy(self, np, values):
+        return _ema_numpy(np, values, self.alpha, values[0])
+
+
+class MovingMedian(SignalFilter):
+    """Mediana krocząca z `window` próbek - usuwa pojedyncze zakłócenia odczytu belki.
+
+    Okno trzymane jest jako lista posortowana (bisekcja), więc koszt próbki zależy od okna, nie od historii.
+    """
+
+    def __init__(self, window):
+        window = _window_size(window, "mediany")
+        self.window = window
+        self.spec = f"median:{window}"
+        self.label = f"Mediana ({window})"
+        self.reset()
+
+    def reset(self):
+        self._order = deque()
+        self._sorted = []
+
+    @property
+    def ready(self):
+        return len(self._order) >= self.window
+
+    def update(self, value):
+        value = float(value)
+        self._order.append(value)
+        if len(self._order) > self.window:
+            oldest = self._order.popleft()
+            del self._sorted[bisect.bisect_left(self._sorted, oldest)]
+        bisect.insort(self._sorted, value)
+        size = len(self._sorted)
+        middle = size // 2
+        if size % 2:
+            return self._sorted[middle]
+        return (self._sorted[middle - 1] + self._sorted[middle]) / 2
+
+    def _process_numpy(self, np, values):
+        head = min(len(values), self.window - 1)
+        fresh = self.spawn()
+        output = np.empty_like(values)
+        output[:head] = [fresh.update(value) for value in values[:head].tolist()]
+        if len(values) > head:
+            windows = np.lib.stride_tricks.sliding_window_view(values, self.window)
+            output[head:] = np.median(windows, axis=1)
+        return output
+
+
+class Kalman1D(SignalFilter):
+    """Jednowymiarowy filtr Kalmana dla naciągu (model błądzenia losowego).
+
+    `process_variance` - jak szybko może zmieniać się rzeczywisty naciąg między próbkami,
+    `measurement_variance` - wariancja szumu odczytu belki. Pierwsza próbka inicjuje stan.
+    """
+
+    def __init__(self, process_variance=1.0, measurement_variance=100.0):
+        self.process_variance = float(process_variance)
+        self.measurement_variance = float(measurement_variance)
+        if not (0 <= self.process_variance < math.inf and 0 < self.measurement_variance < math.inf):
+            raise ValueError("Wariancje filtru Kalmana muszą być dodatnie i skończone.")
+        self.spec = f"kalman:{self.process_variance:g}:{self.measurement_variance:g}"
+        self.label = f"Kalman ({self.process_variance:g}/{self.measurement_variance:g})"
+        self.reset()
+
+    def reset(self):
+        self._value = None
+        self._variance = self.measurement_variance
+
+    @property
+    def ready(self):
+        return self._value is not None
+
+    def _gain(self):
+        self._variance += self.process_variance
+        gain = self._variance / (self._variance + self.measurement_variance)
+        self._variance *= 1.0 - gain
+        return gain
+
+    def update(self, value):
+        if self._value is None:
+            self._value = float(value)
+        else:
+            self._value += self._gain() * (value - self._value)
+        return self._value
+
+    def _process_numpy(self, np, values):
+        # Wzmocnienie nie zależy od danych i szybko zbiega do stałej - dalej filtr jest zwykłą EMA
+        fresh = self.spawn()
+        output = np.empty_like(values)
+        output[0] = fresh.update(values[0])
+        previous_gain = None
+        index = 1
+        while index < len(values):
+            gain = fresh._gain()
+            fresh._value += gain * (values[index] - fresh._value)
+            output[index] = fresh._value
+            index += 1
+            if previous_gain is not None and abs(gain - previous_gain) < 1e-12:
+                break
+            previous_gain = gain
+        if index < len(values):
+            output[index:] = _ema_numpy(np, values[index:], gain, fresh._value)
+        return output
+
+
+FILTERS = {
+    "raw": PassThrough,
+    "ma": MovingAverage,
+    "ema": ExponentialMovingAverage,
+    "median": MovingMedian,
+    "kalman": Kalman1D,
+}
+
+
+def create_filter(spec):
+    """Tworzy filtr z opisu "nazwa:parametr:...", np. "ma:5", "ema:0.2", "median:7", "kalman:1:100"."""
+    name, *args = spec.strip().lower().split(":")
+    factory = FILTERS.get(name)
+    if factory is None:
+        raise ValueError(f"Nieznany filtr: {spec} (dostępne: {', '.join(FILTERS)})")
+    try:
+        return factory(*(float(arg) for arg in args if arg))
+    except TypeError:
+        raise ValueError(f"Nieprawidłowe parametry filtra: {spec}")
+    except (ValueError, OverflowError) as e:
+        raise ValueError(f"Nieprawidłowe parametry filtra: {spec} ({e})") from e
@@ -0,0 +1,168 @@
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+from optional_numpy import load_numpy
+
+MAGIC = b"NWTL0001"
+HEADER = struct.Struct("<8sd8x")  # Znacznik formatu, czas rozpoczęcia nagrania, wyrównanie do 24 B
+RECORD = struct.Struct("<ddd")  # Czas [s od epoki], naciąg (surowy odczyt hx), długość [mm]
+FIELDS = ("time", "tension", "length")
+RECORD_DTYPE = [(field, "<f8") for field in FIELDS]
+
+
+class TelemetryRecorder:
+    """Zapis próbek naciągu i długości do pliku binarnego o rekordach stałej długości (3 x float64).
+
+    append() tylko dopisuje rekord do bufora w pamięci. Wątek zapisujący dopisuje bufor do pliku
+    co `flush_interval` sekund lub po zebraniu `flush_records` próbek. Brak wartości zapisywany jest jako NaN.
+    """
+
+    def __init__(self, path, flush_interval=1.0, flush_records=4096):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_records = flush_records
+        self._buffer = bytearray()
+        self._buffered = 0
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()  # Zapis do pliku poza blokadą bufora - append() nie czeka na dysk
+        self._wakeup = threading.Event()
+        self._closed = False
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, time.time()))
+            self._file.flush()
+        self._thread = threading.Thread(target=self._run, name=f"recorder-{os.path.basename(path)}", daemon=True)
+        self._thread.start()
+
+    def append(self, tension=None, length=None, timestamp=None):
+        record = RECORD.pack(
+            time.time() if timestamp is None else timestamp,
+            math.nan if tension is None else tension,
+            math.nan if length is None else length,
+        )
+        with self._lock:
+            self._buffer += record
+            self._buffered += 1
+            full = self._buffered >= self.flush_records
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        with self._lock:
+            data, self._buffer, self._buffered = self._buffer, bytearray(), 0
+        with self._file_lock:
+            if data and self._file is not None:
+                self._file.write(data)
+                self._file.flush()
+
+    def close(self):
+        """Zatrzymuje wątek zapisujący, zapisuje zaległe rekordy i zamyka plik."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout=2)
+        self.flush()
+        with self._file_lock:
+            self._file.close()
+            self._file = None
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Błąd zapisu nagrania {self.path}: {e}")
+
+
+class TelemetryReader:
+    """Odczyt nagrania przez mmap - otwarcie nie zależy od długości pliku, wycinki czasowe przez bisekcję."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        if size < HEADER.size:
+            raise ValueError(f"Plik {path} nie jest nagraniem telemetrii.")
+        magic, self.start_time = HEADER.unpack(self._file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"Plik {path} nie jest nagraniem telemetrii.")
+        # Niepełny ostatni rekord (np. po awarii w trakcie zapisu) jest pomijany
+        self._count = (size - HEADER.size) // RECORD.size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._count else None
+        np = load_numpy()
+        if np is not None and self._count:
+            self._records = np.frombuffer(self._mmap, dtype=RECORD_DTYPE, count=self._count, offset=HEADER.size)
+            self._values = None
+        else:
+            self._records = None
+            self._values = None
+            if self._count:
+                with memoryview(self._mmap) as raw:
+                    self._values = raw[HEADER.size:HEADER.size + self._count * RECORD.size].cast('d')
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._records = None
+        if self._values is not None:
+            self._values.release()
+            self._values = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # Zwrócone wcześniej tablice NumPy nadal wskazują na plik - mmap zamknie się z nimi
+            self._mmap = None
+        self._file.close()
+
+    def time_at(self, index):
+        if self._records is not None:
+            return float(self._records["time"][index])
+        return self._values[index * 3]
+
+    def index_of(self, timestamp):
+        """Indeks pierwszego rekordu o czasie >= timestamp."""
+        if self._records is not None:
+            return int(load_numpy().searchsorted(self._records["time"], timestamp, side="left"))
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._values[middle * 3] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def slice_index(self, start=0, stop=None):
+        """Zwraca kolumny (czas, naciąg, długość) dla rekordów [start, stop)."""
+        stop = self._count if stop is None else min(stop, self._count)
+        start = max(0, min(start, stop))
+        if self._records is not None:
+            part = self._records[start:stop]
+            return part["time"], part["tension"], part["length"]
+        flat = self._values[start * 3:stop * 3]
+        return list(flat[0::3]), list(flat[1::3]), list(flat[2::3])
+
+    def slice_time(self, start_time=None, end_time=None):
+        """Zwraca kolumny (czas, naciąg, długość) dla rekordów z przedziału czasu [start_time, end_time)."""
+        start = 0 if start_time is None else self.index_of(start_time)
+        stop = self._count if end_time is None else self.index_of(end_time)
+        return self.slice_index(start, stop)
@@ -0,0 +1,476 @@
+import json
+import os
+import selectors
+import socket
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from device_commands import READ_COMMANDS, WRITE_COMMANDS
+from line_protocol import LineFramer
+
+PROTOCOL_VERSION = 1
+DEFAULT_ADDRESS = ("127.0.0.1", 8765)
+
+
+def encode_message(message):
+    """Ramka protokołu: jeden obiekt JSON w linii (UTF-8, zakończony \\n)."""
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def validate_write(register, value):
+    """Zwraca opis błędu żądania zapisu lub None - do łącza trafiają tylko znane rejestry i liczby całkowite."""
+    config = WRITE_COMMANDS.get(register) if isinstance(register, str) else None
+    if config is None:
+        return f"Nieznany rejestr: {register}"
+    if not isinstance(value, int) or isinstance(value, bool):
+        return f"Wartość rejestru {register} musi być liczbą całkowitą"
+    if "min" in config and not config["min"] <= value <= config["max"]:
+        return f"Wartość {value} poza zakresem {config['min']}..{config['max']} rejestru {register}"
+    options = [option for key, option in config.items() if key.startswith("Option")]
+    if options and value not in options:
+        return f"Wartość {value} niedozwolona dla {register} ({', '.join(map(str, options))})"
+    return None
+
+
+def _create_socket(address):
+    """Adres (host, port) -> gniazdo TCP, napis -> gniazdo Unix."""
+    if isinstance(address, str):
+        return socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    return socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+
+class _ClientConnection:
+    def __init__(self, sock, peer):
+        self.sock = sock
+        self.peer = peer
+        self.framer = LineFramer(max_line=64 * 1024)
+        self.outbox = bytearray()
+        self.dropped_frames = 0
+
+
+class TelemetryServer:
+    """Lokalny serwer udostępniający próbki z portu szeregowego wielu odbiorcom.
+
+    Próbki zgłaszane przez publish() są zbierane i wysyłane wszystkim klientom w ramkach co `frame_interval`
+    sekund (lub po `max_batch` próbkach) - jedna ramka jest kodowana raz dla wszystkich, bez żadnej
+    dodatkowej transakcji na łączu szeregowym. Klient, który nie nadąża, traci ramki (licznik dropped),
+    zamiast spowalniać pozostałych.
+
+    Żądania klientów ({"id": 1, "op": "write", "register": "pot_1", "value": 100}, "read", "acquire", "release")
+    wykonywane są kolejno przez jeden wątek. Zapis przyjmuje tylko rejestry z WRITE_COMMANDS i liczby całkowite
+    z ich zakresu, odczyt - tylko komendy z READ_COMMANDS. Klient, który wykonał "acquire", ma wyłączność na zapisy
+    do czasu "release" lub rozłączenia.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, write_func=None, read_func=None, frame_interval=0.05,
+                 max_batch=500, max_client_buffer=1024 * 1024):
+        self.address = address
+        self.write_func = write_func  # write_func(rejestr, wartość) -> odpowiedź urządzenia lub None
+        self.read_func = read_func  # read_func(komenda) -> odpowiedź urządzenia lub None
+        self.frame_interval = frame_interval
+        self.max_batch = max_batch
+        self.max_client_buffer = max_client_buffer
+        self.frames = 0
+        self.samples = 0
+        self.dropped_frames = 0
+        self._batch = []
+        self._replies = deque()  # (klient, wiadomość) z wątku żądań do pętli serwera
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._owner = None  # Klient z wyłącznością zapisu
+        self._selector = None
+        self._listener = None
+        self._wake_recv = None
+        self._wake_send = None
+        self._requests = None
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """Uruchamia serwer i zwraca adres, na którym nasłuchuje."""
+        if self._running:
+            return self.address
+        listener = _create_socket(self.address)
+        if isinstance(self.address, str):
+            if os.path.exists(self.address):
+                os.unlink(self.address)  # Pozostałość po poprzednim uruchomieniu
+        else:
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind(self.address)
+        listener.listen()
+        listener.setblocking(False)
+        if not isinstance(self.address, str):
+            self.address = listener.getsockname()[:2]  # Port 0 -> port przydzielony przez system
+
+        self._listener = listener
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._wake_send.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(listener, selectors.EVENT_READ, "accept")
+        self._selector.register(self._wake_recv, selectors.EVENT_READ, "wake")
+        self._requests = ThreadPoolExecutor(max_workers=1, thread_name_prefix="telemetry-requests")
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="telemetry-server", daemon=True)
+        self._thread.start()
+        return self.address
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        self._requests.shutdown(wait=False, cancel_futures=True)
+        for client in list(self._clients.values()):
+            client.sock.close()
+        self._clients.clear()
+        self._selector.close()
+        self._listener.close()
+        self._wake_recv.close()
+        self._wake_send.close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+    def is_running(self):
+        return self._running
+
+    def client_count(self):
+        return len(self._clients)
+
+    def publish(self, channel, value, timestamp=None):
+        """Dodaje próbkę do najbliższej ramki; może być wywołane z dowolnego wątku."""
+        if not self._running:
+            return
+        with self._lock:
+            self._batch.append((time.time() if timestamp is None else timestamp, channel, value))
+            full = len(self._batch) >= self.max_batch
+        if full:
+            self._wake()
+
+    def stats(self):
+        return {"clients": len(self._clients), "frames": self.frames, "samples": self.samples,
+                "dropped_frames": self.dropped_frames}
+
+    def _wake(self):
+        try:
+            self._wake_send.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # Bufor pełny - pętla i tak zostanie wybudzona
+
+    def _run(self):
+        next_frame = time.monotonic() + self.frame_interval
+        while self._running:
+            timeout = max(0.0, next_frame - time.monotonic())
+            try:
+                events = self._selector.select(timeout)
+            except OSError:
+                break
+            for key, mask in events:
+                try:
+                    if key.data == "accept":
+                        self._accept()
+                    elif key.data == "wake":
+                        self._drain_wake()
+                    else:
+                        if mask & selectors.EVENT_READ:
+                            self._read_client(key.data)
+                        if mask & selectors.EVENT_WRITE and key.data.sock.fileno() != -1:
+                            self._write_client(key.data)
+                except Exception:
+                    traceback.print_exc()
+            self._send_replies()
+            now = time.monotonic()
+            with self._lock:
+                flush = self._batch and (now >= next_frame or len(self._batch) >= self.max_batch)
+            if flush:
+                self._send_frame()
+            if now >= next_frame:
+                next_frame = now + self.frame_interval
+
+    def _accept(self):
+        try:
+            sock, peer = self._listener.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        client = _ClientConnection(sock, peer)
+        self._clients[sock.fileno()] = client
+        self._selector.register(sock, selectors.EVENT_READ, client)
+        self._queue(client, {"type": "hello", "version": PROTOCOL_VERSION, "frame_interval": self.frame_interval})
+
+    def _drain_wake(self):
+        try:
+            while self._wake_recv.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _close_client(self, client):
+        if self._owner is client:
+            self._owner = None
+        self._clients.pop(client.sock.fileno(), None)
+        try:
+            self._selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        client.sock.close()
+
+    def _read_client(self, client):
+        try:
+            data = client.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._close_client(client)
+            return
+        for line in client.framer.feed(data):
+            self._handle_request(client, line)
+
+    def _handle_request(self, client, line):
+        try:
+            request = json.loads(line)
+            op = request.get("op")
+        except (ValueError, AttributeError):
+            self._queue(client, {"type": "error", "error": "Nieprawidłowe żądanie"})
+            return
+        request_id = request.get("id")
+        if op == "acquire":
+            if self._write_denied(client) is None:
+                self._owner = client
+                self._queue(client, {"type": "reply", "id": request_id, "ok": True})
+            else:
+                self._queue(client, {"type": "reply", "id": request_id, "ok": False,
+                                     "error": "Zapis zajęty przez innego klienta"})
+        elif op == "release":
+            if self._owner is client:
+                self._owner = None
+            self._queue(client, {"type": "reply", "id": request_id, "ok": True})
+        elif op == "write":
+            register, value = request.get("register"), request.get("value")
+            error = validate_write(register, value)
+            if error is None:
+                error = self._write_denied(client)
+            if error is None and self.write_func is None:
+                error = "Zapis niedostępny"
+            if error is not None:
+                self._queue(client, {"type": "reply", "id": request_id, "ok": False, "error": error})
+            else:
+                self._requests.submit(self._execute, client, request_id, self.write_func, register, value)
+        elif op == "read":
+            command = request.get("command")
+            # Tylko komendy odczytu - "pot_1_255" przez read ominąłby wyłączność zapisu
+            if command not in READ_COMMANDS:
+                self._queue(client, {"type": "reply", "id": request_id, "ok": False,
+                                     "error": f"Nieznana komenda odczytu: {command}"})
+            elif self.read_func is None:
+                self._queue(client, {"type": "reply", "id": request_id, "ok": False, "error": "Odczyt niedostępny"})
+            else:
+                self._requests.submit(self._execute, client, request_id, self.read_func, command)
+        else:
+            self._queue(client, {"type": "reply", "id": request_id, "ok": False, "error": f"Nieznana operacja: {op}"})
+
+    def _write_denied(self, client):
+        """Opis odmowy, jeśli wyłączność zapisu ma inny klient; w przeciwnym razie None."""
+        if self._owner is not None and self._owner is not client:
+            return "Zapis zajęty przez innego klienta"
+        return None
+
+    def _execute(self, client, request_id, func, *args):
+        # Wątek żądań - jedna operacja na łączu szeregowym naraz, w kolejności napływu
+        try:
+            response = func(*args)
+            reply = {"type": "reply", "id": request_id, "ok": response is not None, "response": response}
+        except Exception as e:
+            reply = {"type": "reply", "id": request_id, "ok": False, "error": str(e)}
+        with self._lock:
+            self._replies.append((client, reply))
+        self._wake()
+
+    def _send_replies(self):
+        with self._lock:
+            replies, self._replies = self._replies, deque()
+        for client, reply in replies:
+            if self._clients.get(client.sock.fileno()) is client:  # Klient mógł się w międzyczasie rozłączyć
+                self._queue(client, reply)
+
+    def _send_frame(self):
+        with self._lock:
+            batch, self._batch = self._batch, []
+        frame = encode_message({"type": "samples", "samples": batch})  # Kodowane raz dla wszystkich klientów
+        self.frames += 1
+        self.samples += len(batch)
+        for client in list(self._clients.values()):
+            if len(client.outbox) + len(frame) > self.max_client_buffer:
+                client.dropped_frames += 1
+                self.dropped_frames += 1
+                continue
+            self._queue_bytes(client, frame)
+
+    def _queue(self, client, message):
+        self._queue_bytes(client, encode_message(message))
+
+    def _queue_bytes(self, client, data):
+        was_empty = not client.outbox
+        client.outbox += data
+        if was_empty:
+            self._write_client(client)
+
+    def _write_client(self, client):
+        try:
+            sent = client.sock.send(client.outbox)
+        except (BlockingIOError, InterruptedError):
+            sent = 0
+        except OSError:
+            self._close_client(client)
+            return
+        del client.outbox[:sent]
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if client.outbox else 0)
+        try:
+            self._selector.modify(client.sock, events, client)
+        except (KeyError, ValueError):
+            pass
+
+
+class TelemetryClient:
+    """Klient serwera telemetrii: odbiór ramek próbek oraz zapisy/odczyty przez połączenie serwera.
+
+    on_samples(lista (czas, kanał, wartość)) wywoływane jest z wątku odbioru klienta.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, on_samples=None, timeout=2.0):
+        self.address = address
+        self.on_samples = on_samples
+        self.timeout = timeout
+        self.hello = None
+        self._sock = None
+        self._next_id = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def connect(self):
+        sock = _create_socket(self.address)
+        sock.connect(self.address)
+        self._sock = sock
+        self._thread = threading.Thread(target=self._reader_loop, name="telemetry-client", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._sock.close()
+            self._sock = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def __enter__(self):
+        return self.connect()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def request(self, op, **fields):
+        """Wysyła żądanie i czeka na odpowiedź serwera (słownik z polami ok, response, error)."""
+        future = Future()
+        with self._lock:
+            self._next_id += 1
+            request_id = self._next_id
+            self._pending[request_id] = future
+        self._sock.sendall(encode_message({"id": request_id, "op": op, **fields}))
+        try:
+            return future.result(self.timeout)
+        except FutureTimeoutError:
+            return {"ok": False, "error": "Przekroczono czas oczekiwania na serwer"}
+        finally:
+            with self._lock:
+                self._pending.pop(request_id, None)
+
+    def write(self, register, value):
+        return self.request("write", register=register, value=value)
+
+    def read(self, command):
+        return self.request("read", command=command)
+
+    def acquire(self):
+        return self.request("acquire").get("ok", False)
+
+    def release(self):
+        return self.request("release").get("ok", False)
+
+    def _reader_loop(self):
+        framer = LineFramer(max_line=64 * 1024 * 1024)  # Ramka próbek może mieć setki kilobajtów
+        sock = self._sock
+        while True:
+            try:
+                data = sock.recv(65536)
+            except OSError:
+                break
+            if not data:
+                break
+            for line in framer.feed(data):
+                self._dispatch(line)
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_result({"ok": False, "error": "Rozłączono z serwerem"})
+
+    def _dispatch(self, line):
+        try:
+            message = json.loads(line)
+        except ValueError:
+            return
+        kind = message.get("type")
+        if kind == "samples":
+            if self.on_samples is not None:
+                try:
+                    self.on_samples(message["samples"])
+                except Exception:
+                    traceback.print_exc()
+        elif kind == "reply":
+            with self._lock:
+                future = self._pending.get(message.get("id"))
+            if future is not None and not future.done():
+                future.set_result(message)
+        elif kind == "hello":
+            self.hello = message
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Podgląd próbek z serwera telemetrii nawijarki.")
+    parser.add_argument("--host", default=DEFAULT_ADDRESS[0])
+    parser.add_argument("--port", type=int, default=DEFAULT_ADDRESS[1])
+    parser.add_argument("--unix", help="ścieżka gniazda Unix zamiast TCP")
+    args = parser.parse_args()
+
+    def print_samples(samples):
+        for timestamp, channel, value in samples:
+            print(f"{timestamp:.3f}\t{channel}\t{value}")
+
+    client = TelemetryClient(args.unix or (args.host, args.port), on_samples=print_samples)
+    client.connect()
+    try:
+        while client._thread is not None and client._thread.is_alive():
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import threading
+import time
+import traceback
+
+from ring_buffer import RingSeries
+
+
+class PIDController:
+    """Regulator PID z ograniczeniem wyjścia, anti-windup i ograniczeniem szybkości zmian wyjścia.
+
+    - różniczkowanie z pomiaru (bez skoku przy zmianie wartości zadanej),
+    - całkowanie warunkowe: człon całkujący nie rośnie, gdy wyjście jest w nasyceniu w kierunku błędu,
+    - `rate_limit` - maksymalna zmiana wyjścia na sekundę (None = bez ograniczenia),
+    - `direction` = -1 dla obiektu o działaniu odwrotnym (wzrost wyjścia zmniejsza pomiar).
+    """
+
+    def __init__(self, kp, ki, kd, setpoint, output_min=0, output_max=255, rate_limit=None, direction=1):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.setpoint = setpoint
+        self.output_min = output_min
+        self.output_max = output_max
+        self.rate_limit = rate_limit
+        self.direction = direction
+        self.reset()
+
+    def reset(self, output=None):
+        """Zeruje stan; `output` to bieżące wyjście (przejście bezuderzeniowe z pracy ręcznej)."""
+        self.integral = self.output_min if output is None else float(output)
+        self.output = self.integral
+        self._last_measurement = None
+
+    def update(self, measurement, dt):
+        error = self.direction * (self.setpoint - measurement)
+        derivative = 0.0
+        if self._last_measurement is not None and dt > 0:
+            derivative = -self.direction * (measurement - self._last_measurement) / dt
+        self._last_measurement = measurement
+
+        integral = self.integral + self.ki * error * dt
+        unclamped = self.kp * error + integral + self.kd * derivative
+        output = min(max(unclamped, self.output_min), self.output_max)
+        saturated_up = unclamped > self.output_max and error > 0
+        saturated_down = unclamped < self.output_min and error < 0
+        if not (saturated_up or saturated_down):
+            self.integral = integral
+        self.integral = min(max(self.integral, self.output_min), self.output_max)
+
+        if self.rate_limit is not None and dt > 0:
+            max_step = self.rate_limit * dt
+            output = min(max(output, self.output - max_step), self.output + max_step)
+        self.output = output
+        return output
+
+
+class TensionControlLoop:
+    """Pętla regulacji naciągu w osobnym wątku, taktowana terminami bezwzględnymi wg time.monotonic.
+
+    Co `period` sekund: read_func() -> pomiar (None = brak nowej próbki), regulator, write_func(wartość całkowita)
+    tylko gdy wartość się zmieniła. Mierzy opóźnienie startu taktu względem terminu (jitter)
+    oraz czas wykonania taktu (opóźnienie pętli).
+    """
+
+    def __init__(self, controller, read_func, write_func, period=0.02, history=1000, name="tension-control"):
+        self.controller = controller
+        self.read_func = read_func
+        self.write_func = write_func
+        self.period = period
+        self.name = name
+        self.jitter = RingSeries(history)  # Opóźnienie startu taktu [s]
+        self.latency = RingSeries(history)  # Czas wykonania taktu [s]
+        self.intervals = RingSeries(history)  # Rzeczywisty odstęp między taktami [s]
+        self.iterations = 0
+        self.missed_samples = 0
+        self.overruns = 0
+        self.writes = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self, initial_output=None):
+        self.stop()
+        self.controller.reset(initial_output)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop_event,), name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self, stop_event):
+        deadline = time.monotonic()
+        last_tick = None
+        last_measured = None  # Chwila ostatniego pomiaru - dt regulatora obejmuje pominięte takty
+        last_written = None
+        while not stop_event.is_set():
+            deadline += self.period
+            delay = deadline - time.monotonic()
+            if delay > 0 and stop_event.wait(delay):
+                return
+            tick = time.monotonic()
+            self.jitter.append(tick - deadline)
+            if last_tick is not None:
+                self.intervals.append(tick - last_tick)
+            last_tick = tick
+
+            try:
+                measurement = self.read_func()
+                if measurement is None:
+                    self.missed_samples += 1
+                else:
+                    dt = tick - last_measured if last_measured is not None else self.period
+                    last_measured = tick
+                    output = int(round(self.controller.update(measurement, dt)))
+                    if output != last_written:
+                        self.write_func(output)
+                        last_written = output
+                        self.writes += 1
+            except Exception:
+                traceback.print_exc()
+            self.iterations += 1
+
+            finished = time.monotonic()
+            self.latency.append(finished - tick)
+            if finished > deadline + self.period:
+                # Takt przekroczył okres - pominięte terminy nie są nadrabiane
+                missed = int((finished - deadline) / self.period)
+                self.overruns += missed
+                deadline += missed * self.period
+
+    def stats(self):
+        """Statystyki pętli w ms: okres, jitter i opóźnienie (średnia, p95, max) oraz liczniki."""
+        def summary(series):
+            values = sorted(series.values())
+            if not values:
+                return {"mean": None, "p95": None, "max": None}
+            return {
+                "mean": round(sum(values) / len(values) * 1000, 3),
+                "p95": round(values[min(len(values) - 1, int(0.95 * len(values)))] * 1000, 3),
+                "max": round(values[-1] * 1000, 3),
+            }
+
+        return {
+            "period_ms": round(self.period * 1000, 3),
+            "interval_ms": summary(self.intervals),
+            "jitter_ms": summary(self.jitter),
+            "latency_ms": summary(self.latency),
+            "iterations": self.iterations,
+            "missed_samples": self.missed_samples,
+            "overruns": self.overruns,
+            "writes": self.writes,
+            "output": round(self.controller.output, 2),
+        }
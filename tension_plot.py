@@ -0,0 +1,206 @@
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk
+
+
+class DecimatedSeries:
+    """Seria (x, y) zredukowana do min/max w przedziałach osi x.
+
+    Liczba przedziałów nie przekracza `max_buckets` (ok. 2 na piksel). Gdy dane wychodzą poza zakres,
+    sąsiednie przedziały są łączone parami, a ich szerokość podwajana - koszt dodania próbki jest O(1)
+    (w średnim ujęciu), a koszt rysowania zależy tylko od szerokości wykresu.
+
+    Seria rośnie w jednym kierunku osi x. Niewielki ruch wstecz (drgania enkodera, krótkie cofnięcie) trafia
+    do bieżącego przedziału. Cofnięcie o więcej niż `reverse_threshold()` (większa z wartości `reverse_distance`
+    i `reverse_buckets` szerokości przedziału) rozpoczyna nową serię od bieżącego punktu, aby nowe próbki
+    nie mieszały się z min/max wcześniejszych przedziałów; jawne zerowanie enkodera - clear().
+    """
+
+    def __init__(self, max_buckets=800, initial_width=1.0, reverse_buckets=4, reverse_distance=0.0):
+        self.max_buckets = max_buckets
+        self.initial_width = initial_width
+        self.reverse_buckets = reverse_buckets
+        self.reverse_distance = reverse_distance
+        self.clear()
+
+    def clear(self):
+        self.x0 = None
+        self.direction = 0  # +1 / -1; 0 - kierunek jeszcze nieznany (x blisko x0)
+        self.last_x = None  # Najdalszy punkt w kierunku serii
+        self.bucket_width = self.initial_width
+        self.buckets = []  # [min y, max y, pierwsza y, ostatnia y]
+        self.count = 0
+
+    def add(self, x, y):
+        if y != y:  # NaN - brak wartości
+            return
+        if self.direction and (self.last_x - x) * self.direction > self.reverse_threshold():
+            self.clear()  # Nawijanie wstecz - nowy przebieg zamiast dopisywania do starych przedziałów
+        if self.x0 is None:
+            self.x0 = self.last_x = x
+        if not self.direction and abs(x - self.x0) > self.reverse_threshold():
+            self.direction = 1 if x > self.x0 else -1
+        if (x - self.last_x) * self.direction > 0:
+            self.last_x = x
+        index = self._index(x)
+        while index >= self.max_buckets:
+            self._merge()
+            index = self._index(x)
+        while len(self.buckets) <= index:
+            self.buckets.append(None)
+        bucket = self.buckets[index]
+        if bucket is None:
+            self.buckets[index] = [y, y, y, y]
+        else:
+            if y < bucket[0]:
+                bucket[0] = y
+            if y > bucket[1]:
+                bucket[1] = y
+            bucket[3] = y
+        self.count += 1
+
+    def reverse_threshold(self):
+        return max(self.reverse_distance, self.reverse_buckets * self.bucket_width)
+
+    def _index(self, x):
+        index = int((x - self.x0) * self.direction / self.bucket_width)
+        # Mały ruch wstecz nie wraca do wcześniejszych przedziałów - trafia do bieżącego
+        return max(0, index, len(self.buckets) - 1)
+
+    def _merge(self):
+        merged = []
+        for i in range(0, len(self.buckets), 2):
+            left = self.buckets[i]
+            right = self.buckets[i + 1] if i + 1 < len(self.buckets) else None
+            if left is None or right is None:
+                merged.append(left or right)
+            else:
+                merged.append([min(left[0], right[0]), max(left[1], right[1]), left[2], right[3]])
+        self.buckets = merged
+        self.bucket_width *= 2
+
+    def points(self):
+        """Zwraca listę (x, min y, max y, pierwsza y, ostatnia y) dla niepustych przedziałów, rosnąco wg x."""
+        direction = self.direction or 1
+        points = [
+            (self.x0 + direction * (i + 0.5) * self.bucket_width, *bucket)
+            for i, bucket in enumerate(self.buckets) if bucket is not None
+        ]
+        if direction < 0:
+            # Przy ruchu wstecz pierwsza/ostatnia próbka zamieniają się rolami względem osi x
+            points = [(x, low, high, last, first) for x, low, high, first, last in reversed(points)]
+        return points
+
+
+class PlotPanel:
+    """Jeden wykres na tk.Canvas z automatyczną skalą; rysowany jedną polilinią."""
+
+    def __init__(self, parent, title, x_label, width, height):
+        self.width = width
+        self.height = height
+        self.margin = 30
+        ttk.Label(parent, text=title).pack(anchor="w")
+        self.canvas = tk.Canvas(parent, width=width, height=height, background="white", highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True, pady=(0, 5))
+        self.canvas.create_rectangle(self.margin, 5, width - 5, height - 20, outline="#bbbbbb")
+        self.line = self.canvas.create_line(0, 0, 0, 0, fill="#1f77b4")
+        self.y_max_text = self.canvas.create_text(2, 5, anchor="nw", font=("Courier", 8))
+        self.y_min_text = self.canvas.create_text(2, height - 20, anchor="sw", font=("Courier", 8))
+        self.x_min_text = self.canvas.create_text(self.margin, height - 2, anchor="sw", font=("Courier", 8))
+        self.x_max_text = self.canvas.create_text(width - 5, height - 2, anchor="se", font=("Courier", 8))
+        self.canvas.create_text(width // 2, height - 2, anchor="s", text=x_label, font=("Courier", 8))
+
+    def draw(self, points):
+        if not points:
+            self.canvas.coords(self.line, 0, 0, 0, 0)
+            return
+        x_min, x_max = points[0][0], points[-1][0]
+        y_min = min(point[1] for point in points)
+        y_max = max(point[2] for point in points)
+        x_span = (x_max - x_min) or 1.0
+        y_span = (y_max - y_min) or 1.0
+        left, right = self.margin, self.width - 5
+        top, bottom = 5, self.height - 20
+        x_scale = (right - left) / x_span
+        y_scale = (bottom - top) / y_span
+
+        coords = []
+        for x, low, high, first, last in points:
+            px = left + (x - x_min) * x_scale
+            # Pionowy odcinek min-max zachowuje szpilki, kolejność first/last - ciągłość linii
+            coords.extend((px, bottom - (first - y_min) * y_scale))
+            if low != high:
+                coords.extend((px, bottom - (low - y_min) * y_scale, px, bottom - (high - y_min) * y_scale))
+            coords.extend((px, bottom - (last - y_min) * y_scale))
+        if len(coords) < 4:
+            coords.extend(coords)
+        self.canvas.coords(self.line, *coords)
+        self.canvas.itemconfigure(self.y_max_text, text=f"{y_max:.0f}")
+        self.canvas.itemconfigure(self.y_min_text, text=f"{y_min:.0f}")
+        self.canvas.itemconfigure(self.x_min_text, text=f"{x_min:.0f}")
+        self.canvas.itemconfigure(self.x_max_text, text=f"{x_max:.0f}")
+
+
+class TensionPlot:
+    """Wykresy naciągu w funkcji długości światłowodu i czasu, odświeżane `fps` razy na sekundę."""
+
+    def __init__(self, parent, width=360, height=160, fps=10):
+        self.interval = max(1, int(1000 / fps))
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._start_time = None
+        # Dwa przedziały na piksel szerokości obszaru wykresu
+        # Cofnięcie długości o mniej niż 1 mm (drgania enkodera) nie rozpoczyna nowego przebiegu
+        self.by_length = DecimatedSeries(max_buckets=2 * width, initial_width=0.01, reverse_distance=1.0)
+        self.by_time = DecimatedSeries(max_buckets=2 * width, initial_width=0.01)
+
+        self.frame = ttk.Frame(parent)
+        self.length_panel = PlotPanel(self.frame, "Naciąg / długość", "[mm]", width, height)
+        self.time_panel = PlotPanel(self.frame, "Naciąg / czas", "[s]", width, height)
+        ttk.Button(self.frame, text="Wyczyść wykres", command=self.clear).pack(pady=5)
+        self._after_id = self.frame.after(self.interval, self._redraw)
+        self.frame.bind("<Destroy>", self._on_destroy, add="+")
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def add_sample(self, tension, length=None, timestamp=None):
+        """Dodaje próbkę (można wołać z dowolnego wątku)."""
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        with self._lock:
+            if self._start_time is None:
+                self._start_time = timestamp
+            self.by_time.add(timestamp - self._start_time, tension)
+            if length is not None:
+                self.by_length.add(length, tension)
+            self._dirty = True
+
+    def clear(self):
+        with self._lock:
+            self.by_length.clear()
+            self.by_time.clear()
+            self._start_time = None
+            self._dirty = True
+
+    def reset_length(self):
+        """Nowy przebieg wykresu naciąg/długość po jawnym zerowaniu enkodera."""
+        with self._lock:
+            self.by_length.clear()
+            self._dirty = True
+
+    def _redraw(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, False
+            if dirty:
+                length_points = self.by_length.points()
+                time_points = self.by_time.points()
+        if dirty:
+            self.length_panel.draw(length_points)
+            self.time_panel.draw(time_points)
+        self._after_id = self.frame.after(self.interval, self._redraw)
+
+    def _on_destroy(self, event):
+        if event.widget is self.frame and self._after_id is not None:
+            self.frame.after_cancel(self._after_id)
+            self._after_id = None
@@ -0,0 +1,16 @@
+import pytest
+
+from signal_filters import MAX_WINDOW, create_filter
+
+
+@pytest.mark.parametrize("spec", ["ma:inf", "ma:nan", "ma:1e9", "ma:2.5", "ma:0", "median:0", "median:inf",
+                                  "median:1e9", "ma:abc", "kalman:inf:100"])
+def test_invalid_filter_parameters_raise_value_error(spec):
+    with pytest.raises(ValueError, match="Nieprawidłowe parametry filtra"):
+        create_filter(spec)
+
+
+def test_window_limits_are_accepted():
+    assert create_filter("ma:1").window == 1
+    assert create_filter(f"median:{MAX_WINDOW}").window == MAX_WINDOW
+    assert create_filter("ma:5").update(10.0) == 10.0
@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("tkinter")
+
+from tension_plot import DecimatedSeries
+
+
+def _filled_series():
+    series = DecimatedSeries(max_buckets=100, initial_width=0.01, reverse_distance=1.0)
+    for i in range(10000):
+        series.add(i * 0.2, 8000.0 + i % 7)  # 0.2 mm na impuls enkodera
+    return series
+
+
+def test_backward_jitter_keeps_history():
+    series = _filled_series()
+    count, before = series.count, series.points()
+    series.add(9998 * 0.2, 9000.0)  # Cofnięcie o jeden impuls
+    series.add(9999 * 0.2, 8000.0)
+    assert series.count == count + 2
+    points = series.points()
+    assert [point[0] for point in points] == [point[0] for point in before]
+    assert max(point[2] for point in points) == 9000.0  # Próbka z cofnięcia trafiła do bieżącego przedziału
+
+
+def test_large_rewind_starts_new_pass():
+    series = _filled_series()
+    threshold = series.reverse_threshold()
+    series.add(9999 * 0.2 - 2 * threshold, 7000.0)
+    assert series.count == 1
+    assert series.points()[0][1] == 7000.0
@@ -0,0 +1,59 @@
+import threading
+import traceback
+
+
+class UiDispatcher:
+    """Kolejka aktualizacji interfejsu.
+
+    Wątki robocze zgłaszają zmiany przez post, a wątek Tk wykonuje je
+    w stałym rytmie (root.after). Zostaje tylko najnowsza wartość danego klucza.
+    """
+
+    def __init__(self, root, fps=30):
+        self.root = root
+        self.interval = max(1, int(1000 / fps))  # Odstęp między klatkami [ms]
+        self._lock = threading.Lock()
+        self._latest = {}  # Klucz (np. nazwa zmiennej Tk) -> (funkcja, argumenty)
+        self._after_id = None
+        self._running = True
+        self.root.bind("<Destroy>", self._on_destroy, add="+")
+        self._after_id = self.root.after(self.interval, self._drain)
+
+    def post(self, key, func, *args):
+        """Zleca wywołanie func(*args) w wątku Tk; starsze zlecenie z tym samym kluczem jest pomijane."""
+        with self._lock:
+            self._latest[key] = (func, args)
+
+    def set_var(self, var, value):
+        """Ustawia zmienną Tk (StringVar, IntVar...) z dowolnego wątku."""
+        self.post(str(var), var.set, value)
+
+    def stop(self):
+        self._running = False
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    def _on_destroy(self, event):
+        if event.widget is self.root:
+            self.stop()
+
+    def _drain(self):
+        with self._lock:
+            latest, self._latest = self._latest, {}
+
+        for func, args in latest.values():
+            self._call(func, args)
+
+        if self._running:
+            # Następna klatka liczona od końca bieżącej - przy przeciążeniu nie narasta zaległość
+            self._after_id = self.root.after(self.interval, self._drain)
+
+    def _call(self, func, args):
+        try:
+            func(*args)
+        except Exception:
+            traceback.print_exc()